@@ -0,0 +1,248 @@
+import asyncio
+import functools
+import threading
+from random import choice
+from typing import Optional
+
+import fleet
+import metrics
+import views
+
+moves = {
+    "KEY_UP": fleet.Direction.UP,
+    "KEY_DOWN": fleet.Direction.DOWN,
+    "KEY_LEFT": fleet.Direction.LEFT,
+    "KEY_RIGHT": fleet.Direction.RIGHT,
+    "KEY_TAB": fleet.Direction.FLIP,
+}
+
+
+def is_enter(key) -> bool:
+    return key == "\n" or getattr(key, "name", None) == "KEY_ENTER"
+
+
+class AsyncHVCCombat:
+    """Human vs computer combat controller built from asyncio tasks."""
+
+    def __init__(
+        self,
+        view,
+        audio_on=True,
+        strategy=None,
+        think_time: float = 0.5,
+        size: int = fleet.GRID_SIZE,
+    ):
+        self.view = view
+        if strategy is None:
+            import targeting
+
+            strategy = functools.partial(targeting.montecarlo_target, budget=think_time)
+        self.strategy = strategy
+        self.think_time = think_time
+        self.computer_fleet = fleet.Fleet("Computer Fleet", size=size)
+        self.computer_fleet.deploy_computer_fleet()
+        self.human_fleet = fleet.Fleet("Human Fleet", size=size)
+        self.audio_on = audio_on
+        self.mixer = None
+        if audio_on:
+            import audio
+
+            self.mixer = audio.AudioMixer()
+        self.keys: Optional[asyncio.Queue] = None
+        self.renders: Optional[asyncio.Queue] = None
+        self.sounds: Optional[asyncio.Queue] = None
+        self.reading = threading.Event()
+
+    def display_grid(self, flt: fleet.Fleet, show_ships: bool, area: views.Areas):
+        self.renders.put_nowait(
+            (area, "display_grid", (flt.ships_grid(show_ships), show_ships, area))
+        )
+
+    def display_text(self, text: str, area: views.Areas):
+        self.renders.put_nowait((area, "display_text", (text, area)))
+
+    def highlight_target(self, flt: fleet.Fleet, point: fleet.Point):
+        self.renders.put_nowait(
+            (views.Areas.BG, "highlight_target", (flt, point, views.Areas.BG))
+        )
+
+    async def render(self):
+        """Apply queued view updates, skipping those a later one for the same area replaces."""
+        while True:
+            area, method, args = await self.renders.get()
+            updates = {area: (method, args)}
+            taken = 1
+            while not self.renders.empty():
+                area, method, args = self.renders.get_nowait()
+                updates.pop(area, None)
+                updates[area] = (method, args)
+                taken += 1
+            for method, args in updates.values():
+                getattr(self.view, method)(*args)
+            # Nothing may follow to paint areas a view held back, so paint now
+            self.view.flush()
+            for _ in range(taken):
+                self.renders.task_done()
+
+    def _read_keys(self, loop: asyncio.AbstractEventLoop):
+        """Runs in a thread, forwarding keystrokes into the keys queue."""
+        term = self.view.term
+        with term.cbreak():
+            while self.reading.is_set():
+                key = term.inkey(timeout=0.1)
+                if key:
+                    loop.call_soon_threadsafe(self.keys.put_nowait, key)
+
+    async def play_sounds(self):
+        """Start queued clips, resolving each one's future when it has played."""
+        loop = asyncio.get_running_loop()
+        while True:
+            paths, done = await self.sounds.get()
+            if not self.audio_on:
+                if done:
+                    done.set_result(None)
+                continue
+            # Decoding a clip missing from the cache happens off the loop
+            voice = await loop.run_in_executor(None, lambda: self.mixer.play(*paths))
+            if done is None or done.cancelled():
+                continue
+            finished = loop.run_in_executor(None, voice.wait)
+            finished.add_done_callback(
+                lambda _, done=done: done.done() or done.set_result(None)
+            )
+
+    async def play(self, *paths: str, wait: bool = False):
+        """Queue clips to play over anything playing, optionally waiting until done."""
+        done = asyncio.get_running_loop().create_future()
+        self.sounds.put_nowait((paths, done if wait else None))
+        if wait:
+            await done
+
+    async def input_human_ships(self):
+        for ship_type in fleet.ship_sizes.keys():
+            await self.play(f"audio/deploy_your_{ship_type}.mp3")
+            next_direction = fleet.Direction.NONE
+            ship = fleet.Ship(
+                ship_type=ship_type,
+                ship_size=fleet.ship_sizes[ship_type],
+                ship_start=fleet.Point(x=0, y=0),
+                ship_horiz=choice((True, False)),
+            )
+            while True:
+                if not self.human_fleet.valid_anchor(ship):
+                    next_direction = choice(list(fleet.Direction))
+                ship = self.human_fleet.next_valid_ship(ship, next_direction)
+                if not self.human_fleet.valid_anchor(ship):
+                    continue
+                self.human_fleet.add_tentative_ship(ship)
+                self.display_grid(self.human_fleet, True, views.Areas.BS)
+                self.display_text(
+                    f"New {ship.ship_type}:\nArrows to move,\nTab to flip \nEnter to anchor",
+                    views.Areas.BT,
+                )
+                key = await self.keys.get()
+                self.human_fleet.remove_tentative_ship(ship)
+                if is_enter(key):
+                    self.human_fleet.add_ship(ship)
+                    self.display_grid(self.human_fleet, True, views.Areas.BS)
+                    break
+                next_direction = moves.get(getattr(key, "name", None), fleet.Direction.NONE)
+                self.display_grid(self.human_fleet, True, views.Areas.BS)
+
+    async def get_fire_coords(self) -> fleet.Point:
+        middle = self.computer_fleet.size // 2
+        target = fleet.Point(x=middle, y=middle)
+        self.display_text("Arrows to choose, Enter to fire.", views.Areas.BT)
+        self.highlight_target(self.computer_fleet, target)
+        while True:
+            key = await self.keys.get()
+            if is_enter(key):
+                break
+            direction = moves.get(getattr(key, "name", None))
+            if direction in fleet.cardinal_directions:
+                moved = fleet.point_moved(target, direction)
+                if fleet.point_valid(moved, self.computer_fleet.size):
+                    target = moved
+                    self.highlight_target(self.computer_fleet, target)
+        self.display_text("", views.Areas.BT)
+        self.computer_fleet.remove_all_highlights()
+        self.display_grid(self.computer_fleet, False, views.Areas.BG)
+        return target
+
+    async def report(self, results, coords: fleet.Point, side: str, area: views.Areas):
+        """Show and sound the result of a shot, return True if it won the game."""
+        hit, sunk, defeated = results
+        location = f"{fleet.heading(coords.y).upper()}-{coords.x + 1}"
+        if defeated:
+            await self.play(f"audio/win_{side}.wav")
+            feedback = f"You sunk my {sunk} and WON THE GAME!"
+        elif sunk:
+            clip = f"your_{sunk}_sunk" if side == "l" else f"you_sunk_{sunk}"
+            await self.play(f"audio/sunk_{side}.wav", f"audio/{clip}.mp3")
+            feedback = f"{'A' if side == 'l' else 'B'}: You sunk my {sunk}!"
+        elif hit:
+            await self.play(f"audio/explosion_{side}.wav")
+            feedback = f"Hit at {location}!"
+        else:
+            await self.play(f"audio/splash_{side}.wav")
+            feedback = f"Miss at {location}!"
+        self.display_text(feedback, area)
+        return defeated
+
+    async def player_b_turn(self) -> bool:
+        with metrics.span("input_wait"):
+            coords = await self.get_fire_coords()
+        with metrics.span("take_fire"):
+            results = self.computer_fleet.take_fire(coords)
+        self.display_grid(self.computer_fleet, False, views.Areas.BG)
+        self.display_grid(self.computer_fleet, True, views.Areas.AS)
+        return await self.report(results, coords, "r", views.Areas.BF)
+
+    async def computer_a_turn(self, next_shot: asyncio.Future) -> bool:
+        coords, _ = await asyncio.gather(next_shot, asyncio.sleep(self.think_time))
+        with metrics.span("take_fire"):
+            results = self.human_fleet.take_fire(coords)
+        self.display_grid(self.human_fleet, False, views.Areas.AG)
+        self.display_grid(self.human_fleet, True, views.Areas.BS)
+        return await self.report(results, coords, "l", views.Areas.AF)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self.keys, self.renders, self.sounds = (
+            asyncio.Queue(),
+            asyncio.Queue(),
+            asyncio.Queue(),
+        )
+        self.reading.set()
+        reader = loop.run_in_executor(None, self._read_keys, loop)
+        # Keys, rendering and sound each run apart, so none holds up the others
+        tasks = [
+            asyncio.create_task(self.render()),
+            asyncio.create_task(self.play_sounds()),
+        ]
+        try:
+            self.display_grid(self.computer_fleet, True, views.Areas.AS)
+            self.display_grid(self.computer_fleet, False, views.Areas.BG)
+            self.display_grid(self.human_fleet, False, views.Areas.AG)
+            await self.input_human_ships()
+            while True:
+                # The human fleet stands still while the human aims, so the
+                # computer can already work out its reply
+                next_shot = loop.run_in_executor(
+                    None, metrics.timed, "ai_decision", self.strategy, self.human_fleet
+                )
+                if await self.player_b_turn():
+                    winner, jingle = "Human", "audio/h_won.mp3"
+                    next_shot.cancel()
+                    break
+                if await self.computer_a_turn(next_shot):
+                    winner, jingle = "Computer", "audio/c_won.mp3"
+                    break
+            await self.renders.join()
+            self.view.show_game_over(winner)
+            await self.play(jingle, wait=True)
+        finally:
+            self.reading.clear()
+            for task in tasks:
+                task.cancel()
+            await reader
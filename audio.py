@@ -0,0 +1,159 @@
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+AUDIO_DIRS = ("audio", "stereo_audio")
+AUDIO_EXTENSIONS = {".mp3", ".wav"}
+
+
+class Voice:
+    """Decoded samples being played, and an Event set once they finish."""
+
+    def __init__(self, samples: np.ndarray):
+        self.samples = samples
+        self.position = 0
+        self.done = threading.Event()
+
+    def read(self, count: int) -> np.ndarray:
+        chunk = self.samples[self.position : self.position + count]
+        self.position += len(chunk)
+        return chunk
+
+    @property
+    def finished(self) -> bool:
+        return self.position >= len(self.samples)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+
+class NullDevice:
+    """Output device that drains the mixer in real time, for machines without sound."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, period: float = 0.02):
+        self.frames = int(sample_rate * period)
+        self.period = period
+        self.running = False
+
+    def start(self, generator):
+        self.running = True
+        threading.Thread(target=self._drain, args=(generator,), daemon=True).start()
+
+    def _drain(self, generator):
+        while self.running:
+            generator.send(self.frames)
+            time.sleep(self.period)
+
+    def close(self):
+        self.running = False
+
+
+class AudioMixer:
+    """Plays clips, decoded once and cached, through one long-lived output device."""
+
+    def __init__(self, cache_size: Optional[int] = 32, device=None):
+        self.cache_size = cache_size
+        self.clips = OrderedDict()
+        self.voices: List[Voice] = []
+        self.waiting = deque()
+        self.lock = threading.Lock()
+        self.closed = False
+        if device is None:
+            import miniaudio
+
+            try:
+                device = miniaudio.PlaybackDevice(
+                    nchannels=CHANNELS, sample_rate=SAMPLE_RATE
+                )
+            except miniaudio.MiniaudioError as err:
+                from loguru import logger
+
+                logger.warning(f"No audio output, playing silently: {err}")
+                device = NullDevice()
+        self.device = device
+        mixer = self._mix()
+        next(mixer)
+        self.device.start(mixer)
+        # Stopping the device from its finalizer at interpreter exit can hang
+        atexit.register(self.close)
+
+    def load(self, path: str) -> np.ndarray:
+        """Return decoded samples of a clip, decoding on a cache miss."""
+        with self.lock:
+            if path in self.clips:
+                self.clips.move_to_end(path)
+                return self.clips[path]
+        import miniaudio
+
+        decoded = miniaudio.decode_file(
+            path,
+            output_format=miniaudio.SampleFormat.SIGNED16,
+            nchannels=CHANNELS,
+            sample_rate=SAMPLE_RATE,
+        )
+        samples = np.frombuffer(decoded.samples, dtype=np.int16)
+        with self.lock:
+            self.clips[path] = samples
+            if self.cache_size is not None:
+                while len(self.clips) > self.cache_size:
+                    self.clips.popitem(last=False)
+        return samples
+
+    def preload(self, dirs: Iterable[str] = AUDIO_DIRS):
+        """Decode every clip in dirs now, so no sound waits on decoding later."""
+        for directory in dirs:
+            for name in sorted(os.listdir(directory)):
+                if os.path.splitext(name)[1] in AUDIO_EXTENSIONS:
+                    self.load(os.path.join(directory, name))
+
+    def play(self, *paths: str, block: bool = False, overlap: bool = True) -> Voice:
+        """Play clips back to back as one voice, over or after anything playing."""
+        # Nothing to play, or nowhere to play it, is already finished
+        if not paths or self.closed:
+            voice = Voice(np.zeros(0, np.int16))
+            voice.done.set()
+            return voice
+        voice = Voice(np.concatenate([self.load(path) for path in paths]))
+        with self.lock:
+            if self.closed:
+                voice.done.set()
+            elif overlap:
+                self.voices.append(voice)
+            else:
+                self.waiting.append(voice)
+        if block:
+            voice.wait()
+        return voice
+
+    def _mix(self):
+        """Generator the device pulls frames from, summing every playing voice."""
+        required = yield b""
+        while True:
+            count = required * CHANNELS
+            mixed = np.zeros(count, dtype=np.int32)
+            with self.lock:
+                if not self.voices and self.waiting:
+                    self.voices.append(self.waiting.popleft())
+                for voice in list(self.voices):
+                    chunk = voice.read(count)
+                    mixed[: len(chunk)] += chunk
+                    if voice.finished:
+                        self.voices.remove(voice)
+                        voice.done.set()
+            required = yield np.clip(mixed, -32768, 32767).astype(np.int16).tobytes()
+
+    def close(self):
+        self.device.close()
+        with self.lock:
+            self.closed = True
+            for voice in self.voices + list(self.waiting):
+                voice.done.set()
+            self.voices.clear()
+            self.waiting.clear()
@@ -0,0 +1,214 @@
+"""Many games against random fleets held as arrays and advanced in lockstep."""
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import fleet
+import placements
+from evaluate import ShotStats, format_table
+from fleet import GRID_SIZE, Fleet, Point
+from simulate import stream_batches
+
+# One shot resolved in one game: flat cell, hit, sunk ship type or "", defeated
+TraceShot = Tuple[int, bool, str, bool]
+
+
+class BatchGames:
+    """A batch of random fleets being fired upon, one array row per game in play."""
+
+    def __init__(
+        self,
+        count: int,
+        size: int = GRID_SIZE,
+        ships: Dict[str, int] = fleet.ship_sizes,
+        rng: Optional[np.random.Generator] = None,
+    ):
+        self.size = size
+        self.ships = dict(ships)
+        self.ship_types = list(ships)
+        self.index = placements.get_index(size, ships.values())
+        self.layouts = placements.random_layouts(count, size, ships, rng)
+        cells = placements.layout_cells(self.index, self.layouts)
+        area = size * size
+        # Padding cells of short ships land in a spare last column
+        ship_at = np.full((count, area + 1), -1, dtype=np.int8)
+        rows = np.broadcast_to(np.arange(count)[:, None, None], cells.shape)
+        numbers = np.broadcast_to(np.arange(len(ships))[None, :, None], cells.shape)
+        ship_at[rows, np.where(cells >= 0, cells, area)] = numbers
+        self.ship_at = ship_at[:, :area]
+        lengths = np.array(list(ships.values()), dtype=np.int16)
+        self.segments = np.tile(lengths, (count, 1))
+        self.ships_afloat = np.full(count, len(ships), dtype=np.int16)
+        self.shot = np.zeros((count, area), dtype=bool)
+        self.shots_fired = np.zeros(count, dtype=np.int32)
+        # Each row's game number in the batch, rows are dropped as games end
+        self.game_ids = np.arange(count)
+        # Shots needed to win each game, filled in as fleets are defeated
+        self.results = np.zeros(count, dtype=np.int32)
+
+    def __len__(self) -> int:
+        """Return the number of games still in play."""
+        return len(self.game_ids)
+
+    def wounded(self) -> np.ndarray:
+        """Return cells, row per game, hit on ships not yet sunk."""
+        segments = np.take_along_axis(self.segments, self.ship_at.clip(0), axis=1)
+        return self.shot & (self.ship_at >= 0) & (segments > 0)
+
+    def fire(self, cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Fire at a flat cell per game, returning hit, sunk ship or -1 and defeated."""
+        rows = np.arange(len(self))
+        ship = self.ship_at[rows, cells]
+        hit = ship >= 0
+        # Like Fleet.take_fire, only fresh hits on ships afloat count
+        landed = hit & ~self.shot[rows, cells] & (self.segments[rows, ship.clip(0)] > 0)
+        self.shot[rows, cells] = True
+        self.segments[rows[landed], ship[landed]] -= 1
+        sunk_now = landed & (self.segments[rows, ship.clip(0)] == 0)
+        self.ships_afloat -= sunk_now
+        defeated = self.ships_afloat == 0
+        self.shots_fired += 1
+        sunk = np.where(sunk_now, ship, -1)
+        # Results come back in row order from before defeated games are dropped
+        if defeated.any():
+            self.results[self.game_ids[defeated]] = self.shots_fired[defeated]
+            self._keep(~defeated)
+        return hit, sunk, defeated
+
+    def _keep(self, rows: np.ndarray):
+        for name in ("ship_at", "segments", "ships_afloat", "shot", "shots_fired"):
+            setattr(self, name, getattr(self, name)[rows])
+        self.game_ids = self.game_ids[rows]
+
+
+def frontier_scores(games: BatchGames) -> np.ndarray:
+    """Score cells as Fleet.frontier_status ranks them, for every game at once."""
+    side = games.size
+    wounded = games.wounded().reshape(-1, side, side)
+    padded = np.pad(wounded, ((0, 0), (2, 2), (2, 2)))
+    adjacent = np.zeros(wounded.shape, dtype=bool)
+    line = np.zeros(wounded.shape, dtype=bool)
+    for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+        near = padded[:, 2 + dy : 2 + dy + side, 2 + dx : 2 + dx + side]
+        y, x = 2 + 2 * dy, 2 + 2 * dx
+        beyond = padded[:, y : y + side, x : x + side]
+        adjacent |= near
+        line |= near & beyond
+    return (adjacent.astype(np.int8) + line).reshape(len(games), -1)
+
+
+def _pick(games: BatchGames, scores, rng: np.random.Generator) -> np.ndarray:
+    """Return the best scoring unshot cell per game, ties broken at random."""
+    keys = rng.random(games.shot.shape)
+    if scores is not None:
+        keys += scores
+    keys[games.shot] = -1
+    return keys.argmax(axis=1)
+
+
+def random_targets(games: BatchGames, rng: np.random.Generator) -> np.ndarray:
+    """Fire at a random unshot cell in every game."""
+    return _pick(games, None, rng)
+
+
+def hunt_targets(games: BatchGames, rng: np.random.Generator) -> np.ndarray:
+    """Finish wounded ships first, lines of hits before lone hits, as classic_target."""
+    return _pick(games, frontier_scores(games), rng)
+
+
+BatchStrategy = Callable[[BatchGames, np.random.Generator], np.ndarray]
+
+BATCH_STRATEGIES: Dict[str, BatchStrategy] = {
+    "random": random_targets,
+    "hunt": hunt_targets,
+}
+
+
+def play_batch(
+    games: BatchGames,
+    strategy: BatchStrategy,
+    rng: np.random.Generator,
+    trace: int = 0,
+) -> List[List[TraceShot]]:
+    """Fire until every fleet is defeated, returning the first trace games' shots."""
+    traces: List[List[TraceShot]] = [[] for _ in range(min(trace, len(games)))]
+    while len(games):
+        cells = strategy(games, rng)
+        ids = games.game_ids
+        hit, sunk, defeated = games.fire(cells)
+        for row in np.flatnonzero(ids < len(traces)):
+            sunk_type = games.ship_types[sunk[row]] if sunk[row] >= 0 else ""
+            traces[ids[row]].append(
+                (int(cells[row]), bool(hit[row]), sunk_type, bool(defeated[row]))
+            )
+    return traces
+
+
+def replay_check(games: BatchGames, game: int, shots: List[TraceShot]):
+    """Replay one game's shots through Fleet, raising ValueError on any difference."""
+    flt = Fleet("Check", rules=fleet.get_ruleset(games.size, games.ships))
+    for ship in placements.layout_ships(games.index, games.layouts[game], games.ships):
+        flt.add_ship(ship)
+    for number, (cell, *expected) in enumerate(shots):
+        point = Point(cell % games.size, cell // games.size)
+        result = flt.take_fire(point)
+        if list(result) != expected:
+            raise ValueError(
+                f"Shot {number} of game {game} at {point}: Fleet gave {result}, "
+                f"batch gave {tuple(expected)}."
+            )
+    if games.results[game] != len(shots):
+        raise ValueError(
+            f"Game {game} took {len(shots)} shots, not {games.results[game]}."
+        )
+
+
+def _batch_shots(
+    start: int, stop: int, seed: int, strategy: str, size: int, verify: int
+) -> List[int]:
+    """Play games start..stop-1 as one batch inside a worker process."""
+    rng = np.random.default_rng([seed, start])
+    games = BatchGames(stop - start, size, rng=rng)
+    traces = play_batch(games, BATCH_STRATEGIES[strategy], rng, verify)
+    for game, shots in enumerate(traces):
+        replay_check(games, game, shots)
+    return games.results.tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--strategy", choices=BATCH_STRATEGIES, default="hunt")
+    parser.add_argument("--size", type=int, default=GRID_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--verify",
+        type=int,
+        default=0,
+        help="Replay this many games of each batch through Fleet and compare.",
+    )
+    args = parser.parse_args()
+
+    stats = ShotStats()
+    start = time.perf_counter()
+    for shots in stream_batches(
+        _batch_shots,
+        args.games,
+        (args.seed, args.strategy, args.size, args.verify),
+        args.workers,
+        args.batch_size,
+    ):
+        stats.add(shots)
+    elapsed = time.perf_counter() - start
+    print(format_table({args.strategy: stats}, statistics.NormalDist().inv_cdf(0.975)))
+    rate = stats.games / elapsed
+    print(f"{stats.games} games in {elapsed:.1f}s ({rate:.0f} games/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Time the fleet, AI and rendering hot paths, and compare against earlier runs."""
+import argparse
+import functools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+from blessed import Terminal
+from rich.console import Console
+
+import bitboard
+import fleet
+import views
+
+ENGINES = {
+    "grid": fleet.Fleet,
+    "sparse": functools.partial(fleet.Fleet, sparse=True),
+    "bitboard": bitboard.BitFleet,
+}
+
+
+def filled_fleet(fleet_type, fill: float, rng: random.Random) -> fleet.Fleet:
+    """Return a deployed fleet with the given fraction of its squares shot."""
+    flt = fleet_type("Benchmark", rng=rng)
+    flt.deploy_computer_fleet(show_progress=False)
+    cells = flt.size * flt.size
+    for index in rng.sample(range(cells), int(cells * fill)):
+        flt.take_fire(fleet.Point(x=index % flt.size, y=index // flt.size))
+    return flt
+
+
+def unshot_points(flt: fleet.Fleet, count: int) -> List[fleet.Point]:
+    """Return up to count distinct random unshot points."""
+    return list(dict.fromkeys(flt.random_unshot_point() for _ in range(count)))
+
+
+def timed(func: Callable, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def bench_take_fire(fleet_type, fill, repeats, rng):
+    times = []
+    while len(times) < repeats:
+        flt = filled_fleet(fleet_type, fill, rng)
+        for point in unshot_points(flt, repeats - len(times)):
+            times.append(timed(flt.take_fire, point))
+    return times
+
+
+def bench_possible_hits(fleet_type, fill, repeats, rng):
+    flt = filled_fleet(fleet_type, fill, rng)
+    return [timed(flt.possible_hits) for _ in range(repeats)]
+
+
+def bench_random_unshot_point(fleet_type, fill, repeats, rng):
+    flt = filled_fleet(fleet_type, fill, rng)
+    return [timed(flt.random_unshot_point) for _ in range(repeats)]
+
+
+def bench_deploy_computer_fleet(fleet_type, fill, repeats, rng):
+    times = []
+    for _ in range(repeats):
+        flt = fleet_type("Benchmark", rng=rng)
+        times.append(timed(flt.deploy_computer_fleet, False))
+    return times
+
+
+def bench_next_valid_ship(fleet_type, fill, repeats, rng):
+    flt = filled_fleet(fleet_type, fill, rng)
+    ship_type = rng.choice(list(fleet.ship_sizes))
+    times = []
+    for _ in range(repeats):
+        ship = fleet.Ship(
+            ship_type,
+            fleet.ship_sizes[ship_type],
+            fleet.Point(rng.randrange(flt.size), rng.randrange(flt.size)),
+            rng.choice((True, False)),
+        )
+        direction = rng.choice(list(fleet.Direction))
+        times.append(timed(flt.next_valid_ship, ship, direction))
+    return times
+
+
+def bench_grid_as_string(fleet_type, fill, repeats, rng):
+    flt = filled_fleet(fleet_type, fill, rng)
+    return [timed(flt.grid.grid_as_string, True, True) for _ in range(repeats)]
+
+
+def bench_display_grid(fleet_type, fill, repeats, rng):
+    flt = filled_fleet(fleet_type, fill, rng)
+    with open(os.devnull, "w") as sink:
+        saved = views.console
+        views.console = Console(
+            file=sink, theme=views.custom_theme, width=120, height=40, force_terminal=True
+        )
+        try:
+            view = views.RichView(Terminal(force_styling=True))
+            return [
+                timed(view.display_grid, flt.ships_grid(True), True, views.Areas.BS)
+                for _ in range(repeats)
+            ]
+        finally:
+            views.console = saved
+
+
+BENCHMARKS = {
+    "take_fire": bench_take_fire,
+    "possible_hits": bench_possible_hits,
+    "random_unshot_point": bench_random_unshot_point,
+    "deploy_computer_fleet": bench_deploy_computer_fleet,
+    "next_valid_ship": bench_next_valid_ship,
+    "grid_as_string": bench_grid_as_string,
+    "display_grid": bench_display_grid,
+}
+
+
+def summarize(times: List[float]) -> Dict[str, float]:
+    ordered = sorted(times)
+    return {
+        "calls": len(ordered),
+        "mean_us": statistics.fmean(ordered) * 1e6,
+        "median_us": statistics.median(ordered) * 1e6,
+        "p95_us": ordered[int(0.95 * (len(ordered) - 1))] * 1e6,
+        "min_us": ordered[0] * 1e6,
+    }
+
+
+def run(names, sizes, fills, repeats, engine, seed) -> Dict:
+    results = []
+    for size in sizes:
+        fleet_type = functools.partial(ENGINES[engine], size=size)
+        for fill in fills:
+            for name in names:
+                rng = random.Random(f"{seed}:{name}:{size}:{fill}")
+                times = BENCHMARKS[name](fleet_type, fill, repeats, rng)
+                row = {"name": name, "size": size, "fill": fill}
+                row.update(summarize(times))
+                results.append(row)
+                print(
+                    f"{name:>22} size {size:>4} fill {fill:4.2f} "
+                    f"median {row['median_us']:10.1f} us  p95 {row['p95_us']:10.1f} us",
+                    file=sys.stderr,
+                )
+    return {
+        "meta": {
+            "engine": engine,
+            "repeats": repeats,
+            "seed": seed,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Return descriptions of benchmarks whose median slowed by over threshold."""
+    before = {(r["name"], r["size"], r["fill"]): r for r in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        old = before.get((row["name"], row["size"], row["fill"]))
+        if not old or not old["median_us"]:
+            continue
+        change = row["median_us"] / old["median_us"] - 1
+        line = (
+            f"{row['name']} size {row['size']} fill {row['fill']}: "
+            f"{old['median_us']:.1f} -> {row['median_us']:.1f} us ({change:+.0%})"
+        )
+        print(line, file=sys.stderr)
+        if change > threshold:
+            regressions.append(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[7, 10, 20])
+    parser.add_argument("--fills", nargs="+", type=float, default=[0.0, 0.5, 0.9])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--engine", choices=ENGINES, default="grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write results as JSON to this file.")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Fractional median slowdown counted as a regression.",
+    )
+    args = parser.parse_args()
+
+    results = run(args.only, args.sizes, args.fills, args.repeats, args.engine, args.seed)
+    if args.out:
+        with open(args.out, "w") as out:
+            json.dump(results, out, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(json.load(baseline_file), results, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import fleet
+import placements
+from fleet import Direction, Point, Ship, Square
+
+
+def point_bit(point: Point, size: int) -> int:
+    """Return single-bit mask for point on a board of given side length."""
+    return 1 << (point.y * size + point.x)
+
+
+def mask_points(mask: int, size: int) -> Iterator[Point]:
+    """Yield Points for each set bit of mask, lowest bit first."""
+    while mask:
+        low = mask & -mask
+        index = low.bit_length() - 1
+        yield Point(x=index % size, y=index // size)
+        mask ^= low
+
+
+def ship_mask(ship: Ship, size: int) -> int:
+    """Return mask of every coordinate occupied by ship."""
+    mask = 0
+    for coord in ship.ship_coords:
+        mask |= point_bit(coord, size)
+    return mask
+
+
+class BitGrid:
+    """Drop-in replacement for fleet.Grid storing each label as an integer bitmask."""
+
+    def __init__(self, side_length: int, rules: Optional[fleet.Ruleset] = None):
+        self.size = side_length
+        self.rules = rules or fleet.get_ruleset(side_length)
+        self.full_mask = (1 << (side_length * side_length)) - 1
+        self.labels: Dict[str, int] = {}
+        self.highlights: Dict[str, int] = {}
+
+    def _bit(self, coords: Point) -> int:
+        return point_bit(coords, self.size)
+
+    def get_char_at(self, coords: Optional[Point]) -> str:
+        """Return water or letter of ship (sunk or not) at coords."""
+        if not coords:
+            return None
+        bit = self._bit(coords)
+        for label, mask in self.labels.items():
+            if mask & bit:
+                return label
+        return "w"
+
+    def set_label_at(self, coords: Point, label: str):
+        self.set_label_mask(self._bit(coords), label)
+
+    def set_label_mask(self, mask: int, label: str):
+        """Set label for every cell in mask, clearing any previous label."""
+        keep = ~mask
+        for key in self.labels:
+            self.labels[key] &= keep
+        # Water is wherever no label's mask has a bit
+        if label != "w":
+            self.labels[label] = self.labels.get(label, 0) | mask
+
+    def mask_of(self, labels) -> int:
+        """Return mask of cells carrying any of the given labels."""
+        mask = 0
+        for label in labels:
+            mask |= self.labels.get(label, 0)
+        return mask
+
+    def list_of_squares_as_points(self):
+        """Return a list of Points representing each grid square."""
+        return [Point(x, y) for x in range(self.size) for y in range(self.size)]
+
+    def _row_mask(self, row: int) -> int:
+        return ((1 << self.size) - 1) << (row * self.size)
+
+    def _col_mask(self, col: int) -> int:
+        mask = 0
+        for row in range(self.size):
+            mask |= 1 << (row * self.size + col)
+        return mask
+
+    def _set_highlight_mask(self, mask: int, highlight_type: str):
+        keep = ~mask
+        for key in self.highlights:
+            self.highlights[key] &= keep
+        if highlight_type:
+            self.highlights[highlight_type] = (
+                self.highlights.get(highlight_type, 0) | mask
+            )
+
+    def get_highlight_at(self, coords: Point) -> str:
+        bit = self._bit(coords)
+        for highlight, mask in self.highlights.items():
+            if mask & bit:
+                return highlight
+        return ""
+
+    def highlight_point(self, point: Point, highlight_type: str):
+        self._set_highlight_mask(self._bit(point), highlight_type)
+
+    def highlight_row(self, row: int, highlight_type: str):
+        """Set the highlight type for all Squares in a given row."""
+        self._set_highlight_mask(self._row_mask(row), highlight_type)
+
+    def highlight_col(self, col: int, highlight_type: str):
+        """Set the highlight type for all Squares in a given column."""
+        self._set_highlight_mask(self._col_mask(col), highlight_type)
+
+    def highlight_reticle(self, point: Point):
+        self.remove_all_highlights()
+        for pt in fleet.reticle_points(point, self.size):
+            self.highlight_point(pt, "yellow")
+
+    def remove_all_highlights(self):
+        self.highlights.clear()
+
+    def ships_grid(self, show_ships: bool, headers: bool) -> List[List[Square]]:
+        """Build Square rows for views from the current masks."""
+        return [
+            [
+                Square(
+                    x,
+                    y,
+                    self.get_char_at(Point(x, y)),
+                    self.get_highlight_at(Point(x, y)),
+                )
+                for x in range(self.size)
+            ]
+            for y in range(self.size)
+        ]
+
+    # Headings and row layout are shared with Grid, only the rows differ
+    grid_as_string = fleet.Grid.grid_as_string
+
+    def row_string(self, row: int, show_ships: bool) -> str:
+        """Return labels of one row as a string, with or without ships."""
+        text = "".join(self.get_char_at(Point(x, row)) for x in range(self.size))
+        return text if show_ships else text.translate(self.rules.hide_ships)
+
+
+class BitFleet(fleet.Fleet):
+    """Fleet on bitmasks, suited to small boards, as every mask spans the board."""
+
+    grid_type = BitGrid
+
+    def __init__(
+        self,
+        name,
+        rng=None,
+        size: int = fleet.GRID_SIZE,
+        rules: Optional[fleet.Ruleset] = None,
+    ):
+        """Initialize BitFleet."""
+        super().__init__(name, rng, size, rules=rules)
+        self.taken_mask = 0
+        self.ship_masks: Dict[Ship, int] = {}
+        self.ship_hits: Dict[Ship, int] = {}
+
+    @property
+    def index(self) -> placements.PlacementIndex:
+        """Shared placement index for this board size and ruleset."""
+        return self.rules.index
+
+    def _ship_mask(self, ship: Ship) -> int:
+        if ship not in self.ship_masks:
+            self.ship_masks[ship] = ship_mask(ship, self.size)
+        return self.ship_masks[ship]
+
+    def shot_mask(self) -> int:
+        """Return mask of every cell already fired upon."""
+        return self.grid.mask_of(self.rules.hit_chars - {None})
+
+    def unsunk_hits(self) -> List[Point]:
+        """Return list of points marked as hit, but not sunk."""
+        return sorted(mask_points(self.grid.labels.get("H", 0), self.size))
+
+    def refresh_grid(self):
+        """Rewrite ship masks to accomadate recent hits."""
+        for ship in self.ships:
+            mask = self._ship_mask(ship)
+            if ship.ship_sunk:
+                self.grid.set_label_mask(mask, ship.char().lower())
+                continue
+            hits = self.ship_hits.get(ship, 0)
+            self.grid.set_label_mask(mask & ~hits, ship.char())
+            self.grid.set_label_mask(hits, "H")
+
+    def take_fire(self, coord: Point) -> Tuple[bool, str, bool]:
+        """Look up ship at coord, mark ship and grid masks."""
+        bit = point_bit(coord, self.size)
+        ship = self.ship_at.get(coord) if bit & self.taken_mask else None
+        if ship is None:
+            self.grid.set_label_mask(bit, "M")
+            self.shot_landed(coord, False)
+            return (False, "", self.defeated)
+        sunk = ""
+        if not ship.ship_sunk:
+            self.ship_hits[ship] = self.ship_hits.get(ship, 0) | bit
+            ship.take_fire(coord)
+            if ship.ship_sunk:
+                self.wounded_ships.discard(ship)
+                sunk = ship.ship_type
+                self.ships_afloat -= 1
+                self.defeated = not self.ships_afloat
+                self.grid.set_label_mask(self.ship_masks[ship], ship.char().lower())
+                self.shot_landed(coord, True, ship)
+            else:
+                self.wounded_ships.add(ship)
+                self.grid.set_label_mask(bit, "H")
+                self.shot_landed(coord, True)
+        return (True, sunk, self.defeated)
+
+    def add_ship(self, ship: Ship) -> None:
+        """Add a ship to the Fleet, and mark its coords as taken."""
+        super().add_ship(ship)
+        self.taken_mask |= self._ship_mask(ship)
+
+    def add_tentative_ship(self, ship: Ship) -> None:
+        """Add a ship to the Fleet, but DON'T mark the coordinates as taken."""
+        if self.valid_anchor(ship):
+            self.ships.add(ship)
+            self.grid.set_label_mask(self._ship_mask(ship), ship.char())
+
+    def remove_tentative_ship(self, ship: Ship) -> None:
+        """Remove temporary ship from fleet, usually to move it elsewhere."""
+        self.ships.remove(ship)
+        self.grid.set_label_mask(self.ship_masks.pop(ship, 0), "w")
+
+    def _placement_free(self, placement: Optional[int]) -> bool:
+        """Return True if placement is on the board and overlaps no taken coord."""
+        if placement is None:
+            return False
+        return not self.index.mask(placement) & self.taken_mask
+
+    def valid_anchor(self, ship: Ship) -> bool:
+        """Given a ship, return True if it fits without overlapping others or borders."""
+        if ship.ship_size in self.index.length_ranges:
+            return self._placement_free(
+                self.index.placement_id(
+                    ship.ship_size, ship.ship_start, ship.ship_horiz
+                )
+            )
+        for coord in ship.ship_coords:
+            if not (0 <= coord.x < self.size and 0 <= coord.y < self.size):
+                # Reaches off grid
+                return False
+        return not ship_mask(ship, self.size) & self.taken_mask
+
+    def next_valid_ship(self, ship: Ship, direction: Direction) -> Ship:
+        """Given a ship and a direction to move, return next valid ship, or same."""
+        if direction == Direction.NONE:
+            return ship
+        horiz = ship.ship_horiz
+        start = ship.ship_start
+        if direction == Direction.FLIP:
+            horiz = not horiz
+        elif direction in {Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT}:
+            start = fleet.point_moved(start, direction)
+        else:
+            raise ValueError("Invalid direction.")
+        while 0 <= start.x < self.size and 0 <= start.y < self.size:
+            placement = self.index.placement_id(ship.ship_size, start, horiz)
+            if self._placement_free(placement):
+                return Ship(ship.ship_type, ship.ship_size, start, horiz, ship.ship_temp)
+            if direction == Direction.FLIP:
+                break
+            start = fleet.point_moved(start, direction)
+        return ship
+
+    def deploy_computer_fleet(self, show_progress: bool = False):
+        """Place each ship at a random placement among those still free."""
+        for ship_type, length in self.rules.ship_sizes.items():
+            free = self.index.fitting(
+                length, placements.packed_mask(self.taken_mask, self.size)
+            )
+            if not len(free):
+                raise ValueError(f"No room left on the board for {ship_type}.")
+            placement = int(free[self.rng.randrange(len(free))])
+            self.add_ship(self.index.ship(placement, ship_type))
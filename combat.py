@@ -1,29 +1,46 @@
 from abc import ABC
+import functools
 from random import randint, choice
-from time import sleep
-import concurrent.futures
-from rich.traceback import install
-from loguru import logger
-from playsound import playsound
+from time import monotonic, sleep
 import threading
 import fleet
+import metrics
 import views
 
-install(show_locals=True)
-
 
 class HVCCombat:
     """Human vs computer combat controller."""
 
-    def __init__(self, view, audio_on=True):
+    def __init__(
+        self,
+        view,
+        audio_on=True,
+        strategy=None,
+        size: int = fleet.GRID_SIZE,
+        think_time: float = 0.5,
+        show_progress: bool = True,
+    ):
+        """Set up both fleets, the computer taking think_time seconds per shot."""
         self.view = view
-        self.computer_fleet = fleet.Fleet("Computer Fleet")
-        self.computer_fleet.deploy_computer_fleet()
+        self.think_time = think_time
+        if strategy is None:
+            # Here rather than at the top, targeting and audio load numpy
+            import targeting
+
+            strategy = functools.partial(targeting.montecarlo_target, budget=think_time)
+        self.strategy = strategy
+        self.computer_fleet = fleet.Fleet("Computer Fleet", size=size)
+        self.computer_fleet.deploy_computer_fleet(show_progress)
         self.view.display_grid(self.computer_fleet.ships_grid(False), False, views.Areas.BG)
         self.view.display_grid(self.computer_fleet.ships_grid(True), True, views.Areas.AS)
-        self.human_fleet = fleet.Fleet("Human Fleet")
+        self.human_fleet = fleet.Fleet("Human Fleet", size=size)
         self.view.display_grid(self.human_fleet.ships_grid(False), False, views.Areas.AG)
         self.audio_on = audio_on
+        self.mixer = None
+        if audio_on:
+            import audio
+
+            self.mixer = audio.AudioMixer()
 
     def input_human_ships(self):
         for ship_type in fleet.ship_sizes.keys():
@@ -56,7 +73,8 @@ class HVCCombat:
                         f"New {ship.ship_type}:\nArrows to move,\nTab to flip \nEnter to anchor",
                         views.Areas.BT,
                     )
-                    chr_in = self.view.get_direction()
+                    with metrics.span("input_wait"):
+                        chr_in = self.view.get_direction()
                     self.view.display_text("", views.Areas.BS)
                     # qu = f"Enter to anchor {ship.ship_type} wasd to move: "
                     # chr_in = input(qu).lower()
@@ -84,16 +102,17 @@ class HVCCombat:
     #     hit_sound_thread.start()
 
     def play_b(self, *args):
-        """Play audio in threads, but block and join."""
-        if self.audio_on:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                executor.map(playsound, args)
+        """Play audio clips in turn, blocking until they finish."""
+        if self.audio_on and args:
+            # Show what the sound is about before blocking on it
+            self.view.flush()
+            with metrics.span("audio"):
+                self.mixer.play(*args, block=True)
 
     def play_nb(self, *args):
         """Play non-blocking audio."""
         if self.audio_on:
-            executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-            executor.map(playsound, args)
+            self.mixer.play(*args)
 
     def hit_sound(self, side):
         self.play_b(f"audio/explosion_{side}.wav")
@@ -108,19 +127,24 @@ class HVCCombat:
         self.play_b(f"audio/sunk_{side}.wav")
 
     def computer_a_turn(self):
-        sleep(0.5)
+        # Show the human's shot before the computer takes its time
+        self.view.flush()
+        started = monotonic()
         game_over = False
         sounds = []
-        if wounded := self.human_fleet.possible_hits():
-            coords = wounded[0]
-        else:
-            coords = self.human_fleet.random_unshot_point()
+        with metrics.span("ai_decision"):
+            coords = self.strategy(self.human_fleet)
+        # Quicker strategies still pause, so the human can follow the game
+        remaining = self.think_time - (monotonic() - started)
+        if remaining > 0:
+            sleep(remaining)
         # self.play_b(
         #     "audio/c_firing.mp3",
         #     f"audio/{chr(coords.y + 97)}.mp3",
         #     f"audio/{coords.x+1}.mp3",
         # )
-        results = self.human_fleet.take_fire(coords)
+        with metrics.span("take_fire"):
+            results = self.human_fleet.take_fire(coords)
         self.view.display_grid(self.human_fleet.ships_grid(False), False, views.Areas.AG)
         self.view.display_grid(self.human_fleet.ships_grid(True), True, views.Areas.BS)
 
@@ -135,10 +159,10 @@ class HVCCombat:
             self.play_b(f"audio/your_{results[1]}_sunk.mp3")
         elif results[0]:
             self.play_b("audio/explosion_l.wav")
-            feedback = f"Hit at {fleet.headings[coords.y].upper()}-{coords.x + 1}!"
+            feedback = f"Hit at {fleet.heading(coords.y).upper()}-{coords.x + 1}!"
         else:
             self.miss_sound("l")
-            feedback = f"Miss at {fleet.headings[coords.y].upper()}-{coords.x + 1}!"
+            feedback = f"Miss at {fleet.heading(coords.y).upper()}-{coords.x + 1}!"
         self.view.display_text(feedback, views.Areas.AF)
 
         self.play_b(*sounds)
@@ -148,13 +172,15 @@ class HVCCombat:
         game_over = False
         sounds = []
         # self.play_nb("audio/enter.mp3")
-        coords = self.view.get_fire_coords(self.computer_fleet)
+        with metrics.span("input_wait"):
+            coords = self.view.get_fire_coords(self.computer_fleet)
         # self.play_b(
         #     "audio/h_firing.mp3",
         #     f"audio/{chr(coords.y + 97)}.mp3",
         #     f"audio/{coords.x+1}.mp3",
         # )
-        results = self.computer_fleet.take_fire(coords)
+        with metrics.span("take_fire"):
+            results = self.computer_fleet.take_fire(coords)
         self.view.display_grid(self.computer_fleet.ships_grid(False), False, views.Areas.BG)
         self.view.display_grid(self.computer_fleet.ships_grid(True), True, views.Areas.AS)
 
@@ -169,10 +195,10 @@ class HVCCombat:
             self.play_b(f"audio/you_sunk_{results[1]}.mp3")
         elif results[0]:
             self.hit_sound("r")
-            feedback = f"Hit at {fleet.headings[coords.y].upper()}-{coords.x + 1}!"
+            feedback = f"Hit at {fleet.heading(coords.y).upper()}-{coords.x + 1}!"
         else:
             self.miss_sound("r")
-            feedback = f"Miss at {fleet.headings[coords.y].upper()}-{coords.x + 1}!"
+            feedback = f"Miss at {fleet.heading(coords.y).upper()}-{coords.x + 1}!"
         self.view.display_text(feedback, views.Areas.BF)
 
         self.play_b(*sounds)
@@ -183,13 +209,17 @@ class HVCCombat:
         self.view.display_grid(self.computer_fleet.ships_grid(False), False, views.Areas.BG)
         self.input_human_ships()
         while True:
-            if self.player_b_turn():
+            with metrics.span("human_turn"):
+                human_won = self.player_b_turn()
+            if human_won:
                 # Player a won!
                 self.view.show_game_over("Human")
-                playsound("audio/h_won.mp3")
+                self.play_b("audio/h_won.mp3")
                 break
-            if self.computer_a_turn():
+            with metrics.span("computer_turn"):
+                computer_won = self.computer_a_turn()
+            if computer_won:
                 # Player b won!
                 self.view.show_game_over("Computer")
-                playsound("audio/c_won.mp3")
+                self.play_b("audio/c_won.mp3")
                 break
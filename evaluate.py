@@ -0,0 +1,207 @@
+"""Measure targeting strategies by the shots they need to sink random fleets."""
+import argparse
+import json
+import math
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import targeting
+from bitboard import BitFleet
+from fleet import GRID_SIZE
+from simulate import ENGINES, game_seed, stream_batches
+
+QUANTILES = (0.1, 0.5, 0.9, 0.99)
+# Games each strategy plays before --precision may stop a run, so a few
+# equal early results can't pass for a precise mean
+MIN_PRECISION_GAMES = 30
+
+
+def shots_to_win(seed, strategy, fleet_type=BitFleet, size: int = GRID_SIZE) -> int:
+    """Return the shots strategy needs to sink a fleet deployed from seed."""
+    target = fleet_type("Target", rng=random.Random(seed), size=size)
+    target.deploy_computer_fleet(show_progress=False)
+    max_shots = size * size
+    for shots in range(1, max_shots + 1):
+        if target.take_fire(strategy(target))[2]:
+            return shots
+    raise RuntimeError(f"Fleet of game {seed} survived {max_shots} shots.")
+
+
+def _evaluate_batch(
+    start: int,
+    stop: int,
+    base_seed: int,
+    names: Sequence[str],
+    fleet_type,
+    size: int,
+) -> List[Tuple[str, int]]:
+    """Play games start..stop-1 with every named strategy inside a worker process."""
+    strategies = [(name, targeting.STRATEGIES[name]) for name in names]
+    return [
+        (name, shots_to_win(game_seed(base_seed, i), strategy, fleet_type, size))
+        for i in range(start, stop)
+        for name, strategy in strategies
+    ]
+
+
+class ShotStats:
+    """Running statistics of shots to win, held as a histogram of shot counts."""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.games = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, shots: int):
+        self.counts[shots] += 1
+        self.games += 1
+        # Welford's method
+        delta = shots - self.mean
+        self.mean += delta / self.games
+        self._m2 += delta * (shots - self.mean)
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self._m2 / (self.games - 1)) if self.games > 1 else 0.0
+
+    def mean_interval(self, z: float) -> Tuple[float, float]:
+        """Return the normal approximation confidence interval of the mean."""
+        half = z * self.stdev / math.sqrt(max(self.games, 1))
+        return self.mean - half, self.mean + half
+
+    def _ranked(self, ranks: Sequence[int]) -> List[int]:
+        """Return the shot counts at the given 1-based ranks, ranks ascending."""
+        values = []
+        seen = 0
+        wanted = iter(ranks)
+        rank = next(wanted, None)
+        for shots in sorted(self.counts):
+            seen += self.counts[shots]
+            while rank is not None and rank <= seen:
+                values.append(shots)
+                rank = next(wanted, None)
+        return values
+
+    def quantile(self, q: float) -> Optional[int]:
+        if not self.games:
+            return None
+        return self._ranked([min(max(math.ceil(q * self.games), 1), self.games)])[0]
+
+    def quantile_interval(self, q: float, z: float) -> Tuple[int, int]:
+        """Return order statistics z binomial deviations either side of quantile q."""
+        spread = z * math.sqrt(self.games * q * (1 - q))
+        low = min(max(math.floor(self.games * q - spread), 1), self.games)
+        high = min(max(math.ceil(self.games * q + spread), 1), self.games)
+        return tuple(self._ranked([low, high]))
+
+    def summary(self, z: float, quantiles: Sequence[float] = QUANTILES) -> Dict:
+        row = {
+            "games": self.games,
+            "mean": self.mean,
+            "mean_ci": self.mean_interval(z),
+            "stdev": self.stdev,
+            "min": min(self.counts, default=None),
+            "max": max(self.counts, default=None),
+        }
+        for q in quantiles:
+            key = f"p{q * 100:g}"
+            row[key] = self.quantile(q)
+            row[f"{key}_ci"] = self.quantile_interval(q, z) if self.games else None
+        return row
+
+
+def format_table(stats: Dict[str, ShotStats], z: float) -> str:
+    lines = [
+        f"{'strategy':<10}{'games':>9}{'mean':>8}  {'mean CI':<15}"
+        f"{'median':>7}  {'median CI':<10}{'p90':>5}{'p99':>5}{'min':>5}{'max':>5}"
+    ]
+    for name, stat in stats.items():
+        if not stat.games:
+            continue
+        low, high = stat.mean_interval(z)
+        median_low, median_high = stat.quantile_interval(0.5, z)
+        lines.append(
+            f"{name:<10}{stat.games:>9}{stat.mean:>8.2f}  "
+            f"{f'[{low:.2f}, {high:.2f}]':<15}{stat.quantile(0.5):>7}  "
+            f"{f'[{median_low}, {median_high}]':<10}{stat.quantile(0.9):>5}"
+            f"{stat.quantile(0.99):>5}{min(stat.counts):>5}{max(stat.counts):>5}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--strategies",
+        nargs="+",
+        choices=targeting.STRATEGIES,
+        default=list(targeting.STRATEGIES),
+    )
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--size", type=int, default=GRID_SIZE)
+    parser.add_argument("--engine", choices=ENGINES, default="bitboard")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument(
+        "--precision",
+        type=float,
+        default=None,
+        help=(
+            "Stop once every mean is known to within this many shots, after at "
+            f"least {MIN_PRECISION_GAMES} games."
+        ),
+    )
+    parser.add_argument(
+        "--report-every", type=float, default=5.0, help="Seconds between reports."
+    )
+    parser.add_argument("--out", help="Write the final statistics as JSON here.")
+    args = parser.parse_args()
+
+    z = statistics.NormalDist().inv_cdf((1 + args.confidence) / 2)
+    stats = {name: ShotStats() for name in args.strategies}
+    results = stream_batches(
+        _evaluate_batch,
+        args.games,
+        (args.seed, args.strategies, ENGINES[args.engine], args.size),
+        args.workers,
+        args.batch_size,
+    )
+    start = last_report = time.perf_counter()
+    try:
+        for name, shots in results:
+            stats[name].add(shots)
+            now = time.perf_counter()
+            if now - last_report >= args.report_every:
+                last_report = now
+                print(format_table(stats, z) + "\n", file=sys.stderr)
+            if args.precision and all(
+                stat.games >= MIN_PRECISION_GAMES
+                and (stat.mean_interval(z)[1] - stat.mean) <= args.precision
+                for stat in stats.values()
+            ):
+                break
+    except KeyboardInterrupt:
+        print("Stopped early.", file=sys.stderr)
+    finally:
+        results.close()
+    elapsed = time.perf_counter() - start
+    played = min(stat.games for stat in stats.values())
+    print(format_table(stats, z))
+    print(
+        f"{played} games per strategy in {elapsed:.1f}s, "
+        f"{args.confidence:.0%} confidence intervals"
+    )
+    if args.out:
+        with open(args.out, "w") as out:
+            json.dump({name: s.summary(z) for name, s in stats.items()}, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
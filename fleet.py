@@ -1,22 +1,44 @@
 from enum import Enum
-from random import randint, choice
-from itertools import chain
+import functools
+import random
 from collections import namedtuple
 import contextlib
+from types import MappingProxyType
 
 with contextlib.suppress(ImportError):
-    from typing import Tuple, Optional, NamedTuple, List, Union
-from rich.traceback import install
-from rich.progress import track
-from loguru import logger
-
-install(show_locals=True)
+    from typing import Dict, Tuple, Optional, NamedTuple, List, Union
 
 # Size of coordinate grid upon which game takes place:
 GRID_SIZE = 7
 
-# Alphabetic row headings:
-headings = [chr(number + ord("a")) for number in range(GRID_SIZE)]
+
+def heading(row: int) -> str:
+    """Return alphabetic heading of a row: a to z, then aa, ab and so on."""
+    name = ""
+    row += 1
+    while row:
+        row, letter = divmod(row - 1, 26)
+        name = chr(letter + ord("a")) + name
+    return name
+
+
+def grid_headings(size: int) -> List[str]:
+    """Return row headings of a board of the given side length."""
+    return [heading(row) for row in range(size)]
+
+
+def column_headings(size: int) -> List[str]:
+    """Return rows numbering the columns from 1, multi-digit numbers reading down."""
+    numbers = [str(column) for column in range(1, size + 1)]
+    digits = len(numbers[-1])
+    return [
+        "".join(number.rjust(digits)[row] for number in numbers)
+        for row in range(digits)
+    ]
+
+
+# Alphabetic row headings of the default board:
+headings = grid_headings(GRID_SIZE)
 
 
 class Orientation(Enum):
@@ -33,6 +55,11 @@ class Direction(Enum):
     NONE = 6
 
 
+cardinal_directions = (Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT)
+# The same directions as x, y steps, for loops too hot for point_moved
+cardinal_steps = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
 # Names and lengths of ships
 ship_sizes = {
     "Patrol Boat": 2,
@@ -47,10 +74,64 @@ ship_capitals = {boat[0] for boat in ship_sizes}
 hit_chars = {"H", "M", None}
 hit_chars.update(c.lower() for c in ship_capitals)
 
+# Shows unsunk and tentative ships as water, for grids seen by the opponent
+hide_ships = str.maketrans(dict.fromkeys(ship_capitals | {"*"}, "w"))
+
 # Used to represent x,y coordinates
 Point = namedtuple("Point", ["x", "y"])
 
 
+class Ruleset:
+    """Tables derived from a board size and its ships, shared by every fleet on it."""
+
+    def __init__(self, size: int, ships: Tuple[Tuple[str, int], ...]):
+        self.size = size
+        self.ship_sizes = MappingProxyType(dict(ships))
+        self.ship_capitals = frozenset(boat[0] for boat in self.ship_sizes)
+        self.hit_chars = frozenset(
+            {"H", "M", None} | {c.lower() for c in self.ship_capitals}
+        )
+        self.hide_ships = MappingProxyType(
+            str.maketrans(dict.fromkeys(self.ship_capitals | {"*"}, "w"))
+        )
+        self.heading_width = len(heading(size - 1))
+
+    def __repr__(self) -> str:
+        return f"Ruleset({self.size}, {dict(self.ship_sizes)})"
+
+    @functools.cached_property
+    def headings(self) -> Tuple[str, ...]:
+        """Row headings of the board."""
+        return tuple(grid_headings(self.size))
+
+    @functools.cached_property
+    def column_headings(self) -> Tuple[str, ...]:
+        """Column number rows of the board, see column_headings."""
+        return tuple(column_headings(self.size))
+
+    @functools.cached_property
+    def points(self) -> Tuple[Point, ...]:
+        """A Point for every square of the board, column by column."""
+        return tuple(Point(x, y) for x in range(self.size) for y in range(self.size))
+
+    @property
+    def index(self):
+        """Shared placement index of these ships on this board."""
+        import placements
+
+        return placements.get_index(self.size, self.ship_sizes.values())
+
+
+def get_ruleset(size: int = GRID_SIZE, ships: Optional[Dict[str, int]] = None):
+    """Return the shared Ruleset for a board size and ship names to lengths."""
+    return _get_ruleset(size, tuple((ship_sizes if ships is None else ships).items()))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_ruleset(size: int, ships: Tuple[Tuple[str, int], ...]) -> Ruleset:
+    return Ruleset(size, ships)
+
+
 def point_moved(point: Point, direction: Direction, distance: int = 1):
     """Returns a new point at the projected location. Does not modify original."""
     if direction == Direction.UP:
@@ -64,69 +145,72 @@ def point_moved(point: Point, direction: Direction, distance: int = 1):
     raise ValueError("Invalid direction given, can't project.")
 
 
-def point_valid(point: Point):
-    """Returns True if point is within grid bounds."""
-    if (point.x < 0) or (GRID_SIZE <= point.x):
+def point_valid(point: Point, size: int = GRID_SIZE):
+    """Returns True if point is within bounds of a grid of given side length."""
+    if (point.x < 0) or (size <= point.x):
         return False
-    if (point.y < 0) or (GRID_SIZE <= point.y):
+    if (point.y < 0) or (size <= point.y):
         return False
     return True
 
 
-def point_above(point: Point) -> Optional[Point]:
+# Neighbour helpers share one signature so surrounding_points and
+# reticle_points can call them alike, those that can't leave the board
+# by the far edges take size without using it
+def point_above(point: Point, size: int = GRID_SIZE) -> Optional[Point]:
     return None if point.y < 1 else Point(point.x, point.y - 1)
 
 
-def point_left(point: Point) -> Optional[Point]:
+def point_left(point: Point, size: int = GRID_SIZE) -> Optional[Point]:
     return None if point.x < 1 else Point(point.x - 1, point.y)
 
 
-def point_upper_left(point: Point) -> Optional[Point]:
+def point_upper_left(point: Point, size: int = GRID_SIZE) -> Optional[Point]:
     if point.y < 1 or point.x < 1:
         return None
     return Point(x=point.x - 1, y=point.y - 1)
 
 
-def point_upper_right(point: Point) -> Optional[Point]:
-    if point.y < 1 or point.x > GRID_SIZE - 2:
+def point_upper_right(point: Point, size: int = GRID_SIZE) -> Optional[Point]:
+    if point.y < 1 or point.x > size - 2:
         return None
     return Point(x=point.x + 1, y=point.y - 1)
 
 
-def point_lower_left(point: Point) -> Optional[Point]:
-    if point.y > GRID_SIZE - 2 or point.x < 1:
+def point_lower_left(point: Point, size: int = GRID_SIZE) -> Optional[Point]:
+    if point.y > size - 2 or point.x < 1:
         return None
     return Point(x=point.x - 1, y=point.y + 1)
 
 
-def point_lower_right(point: Point) -> Optional[Point]:
-    if point.y > GRID_SIZE - 2 or point.x > GRID_SIZE - 2:
+def point_lower_right(point: Point, size: int = GRID_SIZE) -> Optional[Point]:
+    if point.y > size - 2 or point.x > size - 2:
         return None
     return Point(x=point.x + 1, y=point.y + 1)
 
 
-def point_right(point: Point) -> Optional[Point]:
-    return None if point.x > GRID_SIZE - 2 else Point(point.x + 1, point.y)
+def point_right(point: Point, size: int = GRID_SIZE) -> Optional[Point]:
+    return None if point.x > size - 2 else Point(point.x + 1, point.y)
 
 
-def point_below(point: Point) -> Optional[Point]:
-    return None if point.y > GRID_SIZE - 2 else Point(point.x, point.y + 1)
+def point_below(point: Point, size: int = GRID_SIZE) -> Optional[Point]:
+    return None if point.y > size - 2 else Point(point.x, point.y + 1)
 
 
-def surrounding_points(point: Point) -> List:
+def surrounding_points(point: Point, size: int = GRID_SIZE) -> List:
     funcs = [point_above, point_left, point_right, point_below]
-    surrounding = [f(point) for f in funcs]
+    surrounding = [f(point, size) for f in funcs]
     return list(filter(None, surrounding))
 
 
-def reticle_points(point: Point) -> List:
+def reticle_points(point: Point, size: int = GRID_SIZE) -> List:
     funcs = [
         point_upper_left,
         point_lower_left,
         point_upper_right,
         point_lower_right,
     ]
-    corners = [f(point) for f in funcs]
+    corners = [f(point, size) for f in funcs]
     return list(filter(None, corners))
 
 
@@ -148,6 +232,7 @@ class Ship:
         self.ship_horiz = ship_horiz
         self.ship_temp = ship_temp
         self.ship_sunk = False
+        self.hits_left = ship_size
         self.ship_coords = {}
         for i in range(ship_size):
             if ship_horiz:
@@ -169,12 +254,15 @@ class Ship:
 
     def take_fire(self, coord: Point) -> bool:
         """Given a point, mark self and return True if hits."""
-        if self.ship_coords.get(coord):
+        label = self.ship_coords.get(coord)
+        if not label:
+            return False
+        if label != "H" and not self.ship_sunk:
             self.ship_coords[coord] = "H"  # Hit!
-            if all(ch == "H" for ch in self.ship_coords.values()):
+            self.hits_left -= 1
+            if not self.hits_left:
                 self.sink()
-            return True
-        return False
+        return True
 
     def sink(self) -> None:
         """Record self as sunk."""
@@ -223,96 +311,175 @@ class Square:
 
 
 class Grid:
-    """Grid of Squares containing characters and highlight status."""
+    """Grid of labels, a byte per cell, built into Squares only for views."""
 
-    def __init__(self, side_length):
-        self._grid = [
-            [Square(x, y, "w") for x in range(side_length)] for y in range(side_length)
-        ]
+    def __init__(self, side_length, rules: Optional[Ruleset] = None):
+        self.size = side_length
+        self.rules = rules or get_ruleset(side_length)
+        self.labels = bytearray(b"w" * (side_length * side_length))
+        self.highlights = {}
 
     def get_char_at(self, coords: Optional[Point]) -> str:
         """Return water or letter of ship (sunk or not) at coords."""
-        return self._grid[coords.y][coords.x].get_label() if coords else None
+        return chr(self.labels[coords.y * self.size + coords.x]) if coords else None
 
     def set_label_at(self, coords: Point, label: str):
-        self._grid[coords.y][coords.x].set_label(label)
+        self.labels[coords.y * self.size + coords.x] = ord(label)
 
     def list_of_squares_as_points(self):
         """Return a list of Points representing each grid square."""
-        return [Point(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE)]
+        return [Point(x, y) for x in range(self.size) for y in range(self.size)]
+
+    def mask_of(self, labels) -> int:
+        """Return bitmask (bit y * side + x) of squares carrying any of labels."""
+        table = bytes(ord("1") if chr(i) in labels else ord("0") for i in range(256))
+        return int(self.labels.translate(table)[::-1], 2)
 
     def highlight_point(self, point: Point, highlight_type: str):
-        self._grid[point.y][point.x].set_highlight(highlight_type)
+        self.highlights[point] = highlight_type
 
     def highlight_row(self, row: int, highlight_type: str):
         """Set the highlight type for all Squares in a given row."""
-        for square in self._grid[row]:
-            square.set_highlight(highlight_type)
+        for x in range(self.size):
+            self.highlights[Point(x, row)] = highlight_type
 
     def highlight_col(self, col: int, highlight_type: str):
         """Set the highlight type for all Squares in a given column."""
-        for row in self._grid:
-            row[col].set_highlight(highlight_type)
+        for y in range(self.size):
+            self.highlights[Point(col, y)] = highlight_type
 
     def highlight_reticle(self, point: Point):
         self.remove_all_highlights()
-        for pt in reticle_points(point):
+        for pt in reticle_points(point, self.size):
             self.highlight_point(pt, "yellow")
 
     def remove_all_highlights(self):
-        for row in self._grid:
-            for square in row:
-                square.remove_highlight()
+        self.highlights.clear()
 
     def ships_grid(self, show_ships: bool, headers: bool):
-        return self._grid
+        """Build Square rows for views from the current labels."""
+        return [
+            [
+                Square(
+                    x,
+                    y,
+                    self.get_char_at(Point(x, y)),
+                    self.highlights.get(Point(x, y), ""),
+                )
+                for x in range(self.size)
+            ]
+            for y in range(self.size)
+        ]
 
     def grid_as_string(self, show_ships: bool, headers: bool):
         """Return string representation of grid, with or without ships."""
         grid_str = ""
+        width = self.rules.heading_width
         if headers:
-            row_headings = iter(headings)
-            grid_str += " "  # Space before top heading row
-            grid_str += "".join(map(str, range(1, GRID_SIZE + 1)))
-            grid_str += "\n"
-        for row in self._grid:
+            for numbers in self.rules.column_headings:
+                grid_str += " " * width + numbers + "\n"  # Past the row headings
+        for y in range(self.size):
             if headers:
-                grid_str += next(row_headings)
-                grid_str += ""
-            for column in row:
-                if show_ships:
-                    grid_str += column.get_label()
-                elif column.get_label() in {
-                    "a",
-                    "s",
-                    "p",
-                    "d",
-                    "b",
-                    "X",
-                    "H",
-                    "M",
-                    "w",
-                }:
-                    grid_str += column.get_label()
-                else:
-                    grid_str += "w"
+                grid_str += self.rules.headings[y].ljust(width)
+            grid_str += self.row_string(y, show_ships)
             grid_str += "\n"
         grid_str += "\n"
         return grid_str
 
+    def row_string(self, row: int, show_ships: bool) -> str:
+        """Return labels of one row as a string, with or without ships."""
+        start = row * self.size
+        text = self.labels[start : start + self.size].decode("ascii")
+        return text if show_ships else text.translate(self.rules.hide_ships)
+
+
+class SparseGrid(Grid):
+    """Grid storing only squares that aren't water, for huge, mostly empty boards."""
+
+    def __init__(self, side_length, rules: Optional[Ruleset] = None):
+        self.size = side_length
+        self.rules = rules or get_ruleset(side_length)
+        self.rows: Dict[int, Dict[int, str]] = {}
+        self.highlights = {}
+
+    def get_char_at(self, coords: Optional[Point]) -> str:
+        """Return water or letter of ship (sunk or not) at coords."""
+        if not coords:
+            return None
+        row = self.rows.get(coords.y)
+        return row.get(coords.x, "w") if row else "w"
+
+    def set_label_at(self, coords: Point, label: str):
+        if label != "w":
+            self.rows.setdefault(coords.y, {})[coords.x] = label
+            return
+        row = self.rows.get(coords.y)
+        if row:
+            row.pop(coords.x, None)
+            if not row:
+                del self.rows[coords.y]
+
+    def mask_of(self, labels) -> int:
+        """Return bitmask (bit y * side + x) of squares carrying any of labels."""
+        mask = 0
+        water = "w" in labels
+        if water:
+            mask = (1 << (self.size * self.size)) - 1
+        for y, row in self.rows.items():
+            for x, label in row.items():
+                if (label in labels) != water:
+                    mask ^= 1 << (y * self.size + x)
+        return mask
+
+    def row_string(self, row: int, show_ships: bool) -> str:
+        """Return labels of one row as a string, with or without ships."""
+        labels = self.rows.get(row)
+        if not labels:
+            return "w" * self.size
+        chars = ["w"] * self.size
+        for x, label in labels.items():
+            chars[x] = label
+        text = "".join(chars)
+        return text if show_ships else text.translate(self.rules.hide_ships)
+
 
 class Fleet:
     """Fleet of Ships and Grid of hits and misses."""
 
-    def __init__(self, name):
-        """Initialize Fleet."""
+    # Board storage, subclasses with their own engine replace it
+    grid_type = Grid
+
+    def __init__(
+        self,
+        name,
+        rng=None,
+        size: int = GRID_SIZE,
+        sparse: bool = False,
+        rules: Optional[Ruleset] = None,
+    ):
+        """Initialize Fleet on a size by size board, or the board and ships of rules."""
         self.name = name
-        self.grid = Grid(GRID_SIZE)
+        self.rng = rng or random
+        self.rules = rules or get_ruleset(size)
+        self.size = self.rules.size
+        grid_type = SparseGrid if sparse else self.grid_type
+        self.grid = grid_type(self.size, self.rules)
         self.taken_coords = set()
         self.ships = set()
+        self.ship_at = {}  # Point of each anchored ship segment to its Ship
+        self.ships_afloat = 0
         self.wounded_ships = set()
         self.defeated = False
-        self.point_list = self.grid.list_of_squares_as_points()
+        # Hits on ships not yet sunk, and unshot cells worth firing at next.
+        # Dicts are used as insertion-ordered sets, updated as shots land.
+        self.hit_points = {}
+        self.line_frontier = {}  # Unshot cells extending a line of hits
+        self.open_frontier = {}  # Other unshot cells next to a hit
+
+    @property
+    def point_list(self) -> Tuple[Point, ...]:
+        """Return a Point for every square of the board, shared by its ruleset."""
+        return self.rules.points
 
     def highlight_point(self, point: Point, highlight_type: str):
         self.grid.highlight_point(point, highlight_type)
@@ -331,8 +498,11 @@ class Fleet:
 
     def random_unshot_point(self):
         while True:
-            p = Point(y=randint(0, GRID_SIZE - 1), x=randint(0, GRID_SIZE - 1))
-            if self.at_point(p) not in hit_chars:
+            p = Point(
+                y=self.rng.randint(0, self.size - 1),
+                x=self.rng.randint(0, self.size - 1),
+            )
+            if self.at_point(p) not in self.rules.hit_chars:
                 return p
 
     def at_point(self, coords: Optional[Point]) -> str:
@@ -341,13 +511,13 @@ class Fleet:
 
     def unsunk_hits(self) -> List[Point]:
         """Return list of points marked as hit, but not sunk."""
-        # listy = self.point_list
-        return [p for p in self.point_list if self.at_point(p) == "H"]
+        return list(self.hit_points)
 
     def lone_point(self, coords: Point) -> bool:
         """Returns true if point has no hits or misses around it."""
         return all(
-            self.at_point(p) not in hit_chars for p in surrounding_points(coords)
+            self.at_point(p) not in self.rules.hit_chars
+            for p in surrounding_points(coords, self.size)
         )
 
     def possible_hits_for_point(self, point: Point) -> List[Optional[Point]]:
@@ -357,49 +527,111 @@ class Fleet:
         #     f"Surrounding chars of H: {[self.at_point(p) for p in surrounding_points(point)]}"
         # )
         if self.lone_point(point):
-            points.extend(surrounding_points(point))
+            points.extend(surrounding_points(point, self.size))
         # logger.debug(points)
-        if self.at_point(point_above(point)) not in hit_chars and self.hit_below(point):
-            points.append(point_above(point))
-        if self.at_point(point_below(point)) not in hit_chars and self.hit_above(point):
-            points.append(point_below(point))
-        if self.at_point(point_left(point)) not in hit_chars and self.hit_right(point):
-            points.append(point_left(point))
-        if self.at_point(point_right(point)) not in hit_chars and self.hit_left(point):
-            points.append(point_right(point))
+        shot = self.rules.hit_chars
+        above, below = point_above(point, self.size), point_below(point, self.size)
+        left, right = point_left(point, self.size), point_right(point, self.size)
+        if self.at_point(above) not in shot and self.hit_below(point):
+            points.append(above)
+        if self.at_point(below) not in shot and self.hit_above(point):
+            points.append(below)
+        if self.at_point(left) not in shot and self.hit_right(point):
+            points.append(left)
+        if self.at_point(right) not in shot and self.hit_left(point):
+            points.append(right)
         # logger.debug(points)
         points.extend(
-            [p for p in surrounding_points(point) if self.at_point(p) not in hit_chars]
+            [
+                p
+                for p in surrounding_points(point, self.size)
+                if self.at_point(p) not in shot
+            ]
         )
         # logger.debug(points)
         return points
 
-    def possible_hits(self):
-        # logger.debug(self.unsunk_hits())
-        return list(
-            chain.from_iterable(
-                self.possible_hits_for_point(p) for p in self.unsunk_hits()
-            )
-        )
+    def possible_hits(self) -> List[Point]:
+        """Return frontier cells, those extending a line of hits first."""
+        return list(self.line_frontier) + list(self.open_frontier)
+
+    def frontier_target(self) -> Optional[Point]:
+        """Return the best frontier cell to fire upon, or None if empty."""
+        for frontier in (self.line_frontier, self.open_frontier):
+            for point in frontier:
+                return point
+        return None
+
+    def frontier_status(self, point: Point) -> int:
+        """Return 2 if unshot point extends a line of hits, 1 if next to one, else 0."""
+        at = self.grid.get_char_at
+        if at(point) in self.rules.hit_chars:
+            return 0
+        size = self.size
+        status = 0
+        for dx, dy in cardinal_steps:
+            x, y = point.x + dx, point.y + dy
+            if not (0 <= x < size and 0 <= y < size) or at(Point(x, y)) != "H":
+                continue
+            x, y = x + dx, y + dy
+            if 0 <= x < size and 0 <= y < size and at(Point(x, y)) == "H":
+                return 2
+            status = 1
+        return status
+
+    def update_frontier(self, changed: List[Point]):
+        """Re-evaluate cells up to two squares along the row and column of each point."""
+        size = self.size
+        nearby = set(changed)
+        for point in changed:
+            for dx, dy in cardinal_steps:
+                for distance in (1, 2):
+                    x, y = point.x + dx * distance, point.y + dy * distance
+                    if 0 <= x < size and 0 <= y < size:
+                        nearby.add(Point(x, y))
+        for point in nearby:
+            status = self.frontier_status(point)
+            if status != 2:
+                self.line_frontier.pop(point, None)
+            if status != 1:
+                self.open_frontier.pop(point, None)
+            if status == 2:
+                self.line_frontier.setdefault(point, None)
+            elif status == 1:
+                self.open_frontier.setdefault(point, None)
+
+    def shot_landed(self, coord: Point, hit: bool, sunk_ship: Optional[Ship] = None):
+        """Track unsunk hits and the frontier once the grid shows a shot's result."""
+        if not hit:
+            # A miss adds no hit, so only the cell itself leaves the frontier
+            self.line_frontier.pop(coord, None)
+            self.open_frontier.pop(coord, None)
+            return
+        changed = [coord]
+        self.hit_points[coord] = None
+        if sunk_ship:
+            changed = list(sunk_ship.ship_coords)
+            for point in changed:
+                self.hit_points.pop(point, None)
+        self.update_frontier(changed)
 
     def hit_above(self, point: Point) -> bool:
         """Returns true if there is a hit above."""
-        return self.at_point(point_above(point)) == "H"
+        return self.at_point(point_above(point, self.size)) == "H"
 
     def hit_below(self, point: Point) -> bool:
         """Returns true if there is a hit below."""
-        return self.at_point(point_below(point)) == "H"
+        return self.at_point(point_below(point, self.size)) == "H"
 
     def hit_left(self, point: Point) -> bool:
         """Returns true if there is a hit left."""
-        return self.at_point(point_left(point)) == "H"
+        return self.at_point(point_left(point, self.size)) == "H"
 
     def hit_right(self, point: Point) -> bool:
         """Returns true if there is a hit right."""
-        return self.at_point(point_right(point)) == "H"
+        return self.at_point(point_right(point, self.size)) == "H"
 
     def ships_grid(self, show_ships: bool, headers: bool = False):
-        self.refresh_grid()
         return self.grid.ships_grid(show_ships=show_ships, headers=False)
 
     def refresh_grid(self):
@@ -409,36 +641,41 @@ class Fleet:
                 self.grid.set_label_at(coord, label=ship.ship_coords[coord]),
 
     def take_fire(self, coord: Point) -> Tuple[bool, str, bool]:
-        """Pass coord to ships to check for hits, mark ship and/or grid."""
-        hit = False
+        """Look up ship at coord, mark ship and changed grid squares."""
+        ship = self.ship_at.get(coord)
+        if ship is None:
+            self.grid.set_label_at(coord, "M")
+            # logger.info("Miss!")
+            self.shot_landed(coord, False)
+            return (False, "", self.defeated)
         sunk = ""
-        for s in self.ships:
-            if s.take_fire(coord):
-                self.wounded_ships.add(s)
-                # logger.debug(self.wounded_ships)
-                hit = True
-                # logger.info("Hit!")
-                if s.ship_sunk:
-                    self.wounded_ships.remove(s)
-                    # logger.debug(self.wounded_ships)
-                    sunk = s.ship_type
-                    if all(ship.ship_sunk for ship in self.ships):
-                        self.defeated = True
-                return (hit, sunk, self.defeated)
-
-        self.grid.set_label_at(coord, "M")
-        # logger.info("Miss!")
-        self.refresh_grid()
-        return (hit, sunk, self.defeated)
+        if not ship.ship_sunk:
+            ship.take_fire(coord)
+            if ship.ship_sunk:
+                self.wounded_ships.discard(ship)
+                sunk = ship.ship_type
+                self.ships_afloat -= 1
+                self.defeated = not self.ships_afloat
+                for point, label in ship.ship_coords.items():
+                    self.grid.set_label_at(point, label)
+                self.shot_landed(coord, True, ship)
+            else:
+                self.wounded_ships.add(ship)
+                self.grid.set_label_at(coord, "H")
+                self.shot_landed(coord, True)
+        return (True, sunk, self.defeated)
 
     def add_ship(self, ship: Ship) -> None:
         """Add a ship to the Fleet, and mark its coords as taken."""
         if self.valid_anchor(ship):
             ship.ship_temp = False
             self.ships.add(ship)
+            self.ships_afloat += 1
             for coord in ship.ship_coords.keys():
                 ship.ship_coords[coord] = ship.char()
                 self.taken_coords.add((coord.y, coord.x))
+                self.ship_at[coord] = ship
+                self.grid.set_label_at(coord, ship.char())
         else:
             raise ValueError("Can't add ship there, it overlaps other ships.")
 
@@ -446,14 +683,14 @@ class Fleet:
         """Add a ship to the Fleet, but DON'T mark the coordinates as taken."""
         if self.valid_anchor(ship):
             self.ships.add(ship)
-            self.refresh_grid()
+            for coord, label in ship.ship_coords.items():
+                self.grid.set_label_at(coord, label)
 
     def remove_tentative_ship(self, ship: Ship) -> None:
         """Remove temporary ship from fleet, usually to move it elsewhere."""
         self.ships.remove(ship)
         for coord in ship.ship_coords.keys():
             self.grid.set_label_at(coord, "w")
-        self.refresh_grid()
 
     def valid_anchor(self, ship: Ship) -> bool:
         """Given a ship, return True if it fits without overlapping others or borders."""
@@ -461,7 +698,7 @@ class Fleet:
             if (coord.y, coord.x) in self.taken_coords:
                 # Overlaps other ship
                 return False
-            if (coord.x >= GRID_SIZE) or (coord.y >= GRID_SIZE):
+            if not point_valid(coord, self.size):
                 # Reaches off grid
                 return False
         return True
@@ -470,10 +707,10 @@ class Fleet:
         """Given a ship and a direction to move, return next valid ship, or same."""
         start = ship.ship_start
         cardinals = {Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT}
-        while point_valid(start):
+        while point_valid(start, self.size):
             if direction in cardinals:
                 start = point_moved(start, direction)
-                if point_valid(start):
+                if point_valid(start, self.size):
                     test = Ship(
                         ship.ship_type,
                         ship.ship_size,
@@ -500,19 +737,24 @@ class Fleet:
                 raise ValueError("Invalid direction.")
         return ship
 
-    def deploy_computer_fleet(self):
+    def deploy_computer_fleet(self, show_progress: bool = True):
         """Generate randomly placed Fleet for the computer side."""
-        for ship_type in track(
-            ship_sizes.keys(), description="Deploying computer ships..."
-        ):
+        ship_sizes = self.rules.ship_sizes
+        ship_types = ship_sizes.keys()
+        if show_progress:
+            from rich.progress import track
+
+            ship_types = track(ship_types, description="Deploying computer ships...")
+        for ship_type in ship_types:
             while True:
                 ship = Ship(
                     ship_type=ship_type,
                     ship_size=ship_sizes[ship_type],
                     ship_start=Point(
-                        randint(0, GRID_SIZE - 1), randint(0, GRID_SIZE - 1)
+                        self.rng.randint(0, self.size - 1),
+                        self.rng.randint(0, self.size - 1),
                     ),
-                    ship_horiz=choice((True, False)),
+                    ship_horiz=self.rng.choice((True, False)),
                 )
                 if self.valid_anchor(ship):
                     self.add_ship(ship)
@@ -0,0 +1,75 @@
+from typing import List, Optional
+
+
+class FrameBuffer:
+    """Last frame pushed to a Matrix8x8x2, so only changed pixels are written."""
+
+    def __init__(self, matrix, width: int = 8, height: int = 8):
+        self.matrix = matrix
+        # Otherwise every pixel set sends the whole buffer, twice, over I2C
+        self.matrix.auto_write = False
+        self.width = width
+        self.height = height
+        # None forces the first frame to write every pixel
+        self.frame: List[List[Optional[int]]] = [[None] * width for _ in range(height)]
+
+    def draw(self, frame: List[List[int]]) -> int:
+        """Write pixels that differ from the last frame, return how many did."""
+        changed = 0
+        # Pixels beyond the matrix are dropped, as the driver does
+        for row_num, row in enumerate(frame[: self.height]):
+            shown = self.frame[row_num]
+            for col_num, color in enumerate(row[: self.width]):
+                if shown[col_num] != color:
+                    self.matrix[row_num, col_num] = color
+                    shown[col_num] = color
+                    changed += 1
+        if changed:
+            self.matrix.show()
+        return changed
+
+
+class MockMatrix8x8x2:
+    """Stand-in for adafruit_ht16k33.matrix.Matrix8x8x2 that counts bus writes."""
+
+    LED_OFF = 0
+    LED_RED = 1
+    LED_GREEN = 2
+    LED_YELLOW = 3
+
+    def __init__(self, i2c=None, address: int = 0x70, auto_write: bool = True):
+        self.address = address
+        self.auto_write = auto_write
+        self.pixels = [[self.LED_OFF] * 8 for _ in range(8)]
+        self.pixel_sets = 0
+        self.bus_writes = 0
+
+    def pixel(self, x: int, y: int, color: Optional[int] = None) -> Optional[int]:
+        if not (0 <= x <= 7 and 0 <= y <= 7):
+            return None
+        if color is None:
+            return self.pixels[x][y]
+        self.pixels[x][y] = color
+        self.pixel_sets += 1
+        # The driver sets a bit in the red and green planes, sending each
+        if self.auto_write:
+            self.bus_writes += 2
+        return None
+
+    def __setitem__(self, key, value):
+        x, y = key
+        self.pixel(x, y, value)
+
+    def __getitem__(self, key):
+        x, y = key
+        return self.pixel(x, y)
+
+    def fill(self, color: int):
+        for x in range(8):
+            for y in range(8):
+                self.pixels[x][y] = color
+        if self.auto_write:
+            self.show()
+
+    def show(self):
+        self.bus_writes += 1
@@ -0,0 +1,284 @@
+"""Load test a match server with scripted clients playing complete games."""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+import fleet
+import record
+import targeting
+from fleet import Fleet, Point, Ship
+from server import MatchClient, ProtocolError
+
+
+class StageStats:
+    """Latencies and counts gathered by every client during one stage."""
+
+    def __init__(self):
+        self.round_trips: List[float] = []
+        self.matches = 0
+        self.errors = 0
+
+    def summary(self, clients: int, seconds: float, rss: Optional[int]) -> Dict:
+        ordered = sorted(self.round_trips)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return ordered[int(fraction * (len(ordered) - 1))] * 1e3
+
+        return {
+            "clients": clients,
+            "seconds": seconds,
+            "shots": len(ordered),
+            "matches": self.matches,
+            "matches_per_s": self.matches / seconds,
+            "errors": self.errors,
+            "rtt_p50_ms": percentile(0.5),
+            "rtt_p95_ms": percentile(0.95),
+            "rtt_p99_ms": percentile(0.99),
+            "rtt_max_ms": percentile(1.0),
+            "server_rss_mb": rss / 2**20 if rss is not None else None,
+        }
+
+
+def mark_shot(board: Fleet, point: Point, hit: bool, sunk_ship: Optional[Ship]):
+    """Mark a shot's result on a board of the opponent's waters, as their grid would."""
+    if sunk_ship:
+        for coord in sunk_ship.ship_coords:
+            board.grid.set_label_at(coord, sunk_ship.char().lower())
+    else:
+        board.grid.set_label_at(point, "H" if hit else "M")
+    board.shot_landed(point, hit, sunk_ship)
+
+
+async def play_match(
+    client: MatchClient,
+    stats: StageStats,
+    opponent: str,
+    size: int,
+    strategy,
+    rng: random.Random,
+):
+    """Play one game against the server's AI, timing each of our shots."""
+    await client.send("new", seats=["human", opponent], size=size)
+    await client.expect("created")
+    ships = Fleet("Ours", rng=rng, size=size)
+    ships.deploy_computer_fleet(show_progress=False)
+    await client.send(
+        "place",
+        ships=[
+            {"type": p.ship_type, "x": p.x, "y": p.y, "horiz": p.horiz}
+            for p in record.fleet_placements(ships)
+        ],
+    )
+    board = Fleet("Theirs", rng=rng, size=size)
+    fired_at = None
+    while True:
+        message = await client.expect("start", "shot", "over")
+        if message["event"] == "over":
+            stats.matches += 1
+            return
+        if message["event"] == "shot" and message["seat"] == 0:
+            stats.round_trips.append(time.perf_counter() - fired_at)
+            sunk_ship = None
+            if message["sunk"]:
+                placed = message["ship"]
+                sunk_ship = Ship(
+                    placed["ship_type"],
+                    placed["ship_size"],
+                    Point(placed["x"], placed["y"]),
+                    placed["horiz"],
+                )
+            point = Point(message["x"], message["y"])
+            mark_shot(board, point, message["hit"], sunk_ship)
+        if message["turn"] == 0 and not message.get("defeated"):
+            point = strategy(board)
+            fired_at = time.perf_counter()
+            await client.send("fire", x=point.x, y=point.y)
+
+
+async def player(
+    host, port, stop: asyncio.Event, stats_ref: List[StageStats], args, seed
+):
+    """Play games until stop is set, counting into stats_ref's current stage."""
+    rng = random.Random(seed)
+    strategy = targeting.STRATEGIES[args.strategy]
+    try:
+        client = await MatchClient.connect(host, port)
+    except OSError:
+        stats_ref[0].errors += 1
+        return
+    try:
+        while not stop.is_set():
+            await play_match(
+                client, stats_ref[0], args.opponent, args.size, strategy, rng
+            )
+    except (OSError, ValueError, ProtocolError) as err:
+        stats_ref[0].errors += 1
+        print(f"Client failed: {err!r}", file=sys.stderr)
+    finally:
+        await client.close()
+
+
+def server_rss(pid: Optional[int]) -> Optional[int]:
+    """Return resident memory of process pid in bytes, where /proc provides it."""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def raise_file_limit():
+    """Allow as many open sockets as the hard limit permits, here and in the server."""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def start_server(port: int) -> asyncio.subprocess.Process:
+    """Run server.py on port with instant AI replies, waiting until it accepts."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        os.path.join(here, "server.py"),
+        "--port",
+        str(port),
+        "--ai-delay",
+        "0",
+        "--stats-every",
+        "3600",
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return process
+        except OSError:
+            await asyncio.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Match server didn't start.")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run(args) -> List[Dict]:
+    process = None
+    host, port, pid = args.host, args.port, args.server_pid
+    if port is None:
+        host, port = "127.0.0.1", free_port()
+        process = await start_server(port)
+        pid = process.pid
+    results = []
+    idle = []
+    stop = asyncio.Event()
+    stats_ref = [StageStats()]
+    tasks = []
+    try:
+        baseline = server_rss(pid)
+        for _ in range(args.idle):
+            idle.append(await asyncio.open_connection(host, port))
+        for stage in args.ramp:
+            stats_ref[0] = StageStats()
+            while len(tasks) < stage:
+                seed = f"{args.seed}:{len(tasks)}"
+                tasks.append(
+                    asyncio.create_task(player(host, port, stop, stats_ref, args, seed))
+                )
+            started = time.perf_counter()
+            await asyncio.sleep(args.stage_seconds)
+            row = stats_ref[0].summary(
+                stage, time.perf_counter() - started, server_rss(pid)
+            )
+            row["idle"] = len(idle)
+            row["server_rss_growth_mb"] = (
+                row["server_rss_mb"] - baseline / 2**20
+                if baseline is not None and row["server_rss_mb"] is not None
+                else None
+            )
+            results.append(row)
+            print(format_row(row), file=sys.stderr)
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for _, writer in idle:
+            writer.close()
+        if process:
+            process.terminate()
+            await process.wait()
+    return results
+
+
+def format_row(row: Dict) -> str:
+    def ms(value):
+        return f"{value:7.2f}" if value is not None else "      -"
+
+    rss = row["server_rss_mb"]
+    return (
+        f"{row['clients']:>6} clients {row['matches_per_s']:8.1f} matches/s "
+        f"rtt ms p50 {ms(row['rtt_p50_ms'])} p95 {ms(row['rtt_p95_ms'])} "
+        f"p99 {ms(row['rtt_p99_ms'])}  server "
+        + (f"{rss:7.1f} MB" if rss is not None else "   - MB")
+        + f"  errors {row['errors']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=None,
+        help="Port of a running server, otherwise one is started locally.",
+    )
+    parser.add_argument(
+        "--server-pid", type=int, default=None, help="Running server, to watch memory."
+    )
+    parser.add_argument(
+        "--ramp",
+        nargs="+",
+        type=int,
+        default=[10, 100, 500, 1000],
+        help="Concurrent playing clients in each stage.",
+    )
+    parser.add_argument("--stage-seconds", type=float, default=10.0)
+    parser.add_argument(
+        "--idle", type=int, default=0, help="Extra connections held open and silent."
+    )
+    parser.add_argument("--opponent", choices=targeting.STRATEGIES, default="classic")
+    parser.add_argument("--strategy", choices=targeting.STRATEGIES, default="classic")
+    parser.add_argument("--size", type=int, default=fleet.GRID_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write stage results as JSON to this file.")
+    args = parser.parse_args()
+
+    raise_file_limit()
+    results = asyncio.run(run(args))
+    if args.out:
+        with open(args.out, "w") as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
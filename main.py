@@ -1,19 +1,51 @@
+import argparse
 from blessed import Terminal
-from views import RichView
+from views import LiveRichView, RichView
 from combat import HVCCombat
-from rich.traceback import install
+from render import RenderScheduler
+from startup import lazy_tracebacks
+import metrics
 
-install(show_locals=True)
+lazy_tracebacks()
 
 term = Terminal()
 
 
-def main():
-    view = RichView(term)
+def main(live: bool = False, max_fps: float = 0, use_async: bool = False):
+    view = LiveRichView(term) if live else RichView(term)
+    if max_fps:
+        view = RenderScheduler(view, max_fps)
+    if use_async:
+        import asyncio
+
+        from async_combat import AsyncHVCCombat
+
+        asyncio.run(AsyncHVCCombat(view, True).run())
+        return
     ctrl = HVCCombat(view, True)
     ctrl.run()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--live", action="store_true", help="Repaint only changed screen areas."
+    )
+    parser.add_argument(
+        "--max-fps", type=float, default=0, help="Coalesce redraws to this frame rate."
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run input, rendering, sound and the computer player as asyncio tasks.",
+    )
+    parser.add_argument(
+        "--metrics",
+        help="Write span timings to METRICS.prom and METRICS.jsonl, see metrics.py.",
+    )
+    args = parser.parse_args()
+    if args.metrics:
+        metrics.enable(args.metrics)
     with term.hidden_cursor():
-        main()
+        main(args.live, args.max_fps, args.use_async)
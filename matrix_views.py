@@ -2,25 +2,35 @@ from enum import Enum, auto
 from typing import List
 import os
 
-import board
-from adafruit_ht16k33.matrix import Matrix8x8x2
 from loguru import logger
 from blessed import Terminal, keyboard
-from rich.traceback import install
-
 import fleet
+import metrics
+from framebuffer import FrameBuffer
 from views import Areas
 
-install(show_locals=True)
 
-i2c = board.I2C()
+def hardware_matrices():
+    """Open the guess and fleet LED matrices on the board's I2C bus."""
+    import board
+    from adafruit_ht16k33.matrix import Matrix8x8x2
+
+    i2c = board.I2C()
+    return Matrix8x8x2(i2c, 0x70), Matrix8x8x2(i2c, 0x71)
 
 
 class MatrixView:
-    def __init__(self, term: Terminal):
+    def __init__(self, term: Terminal, guess_matrix=None, fleet_matrix=None):
+        """Initialize MatrixView, on given matrices (such as mocks) or hardware."""
         self.term = term
-        self.guess_matrix = Matrix8x8x2(i2c, 0x70)
-        self.fleet_matrix = Matrix8x8x2(i2c, 0x71)
+        if guess_matrix is None or fleet_matrix is None:
+            guess_matrix, fleet_matrix = hardware_matrices()
+        self.guess_matrix = guess_matrix
+        self.fleet_matrix = fleet_matrix
+        self.buffers = {
+            Areas.BG: FrameBuffer(self.guess_matrix),
+            Areas.BS: FrameBuffer(self.fleet_matrix),
+        }
 
         self.theme_dict = {
             "w": self.guess_matrix.LED_OFF,  # Water
@@ -43,25 +53,29 @@ class MatrixView:
     def display_grid(
         self, grid: List[List[fleet.Square]], show_ships: bool, area: Areas
     ):
-        if area == Areas.BG:
-            matrix = self.guess_matrix
-        elif area == Areas.BS:
-            matrix = self.fleet_matrix
-        else:
+        if area not in self.buffers:
             return
-        for row_num, row in enumerate(grid):
-            for col_num, square in enumerate(row):
+        frame = []
+        for row in grid:
+            colors = []
+            for square in row:
                 label = square.get_label()
                 if highlight := square.get_highlight():
-                    matrix[row_num, col_num] = matrix.LED_YELLOW
+                    colors.append(self.guess_matrix.LED_YELLOW)
                 else:
                     if not show_ships and label in fleet.ship_capitals:
                         label = "w"
-                    matrix[row_num, col_num] = self.theme_dict[label]
+                    colors.append(self.theme_dict[label])
+            frame.append(colors)
+        with metrics.span("render"):
+            self.buffers[area].draw(frame)
 
     def display_text(self, text: str, ar: Areas):
         logger.info(text)
 
+    def flush(self):
+        """Every display call already reaches the matrices."""
+
     def highlight_target(self, flt: fleet.Fleet, point: fleet.Point, area: Areas):
         flt.highlight_reticle(point)
         self.display_grid(
@@ -99,7 +113,7 @@ class MatrixView:
                         area=Areas.BG,
                     )
             elif key.name == "KEY_DOWN":
-                if target_y < fleet.GRID_SIZE - 1:
+                if target_y < flt.size - 1:
                     target_y += 1
                     self.highlight_target(
                         flt=flt,
@@ -115,7 +129,7 @@ class MatrixView:
                         area=Areas.BG,
                     )
             elif key.name == "KEY_RIGHT":
-                if target_x < fleet.GRID_SIZE - 1:
+                if target_x < flt.size - 1:
                     target_x += 1
                     self.highlight_target(
                         flt=flt,
@@ -0,0 +1,181 @@
+"""Timing spans around the slow parts of a turn, exported as metrics files."""
+import atexit
+import bisect
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+# Upper bounds in seconds, from a fast board update to waiting on a player
+BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    math.inf,
+)
+METRIC = "battleship_span_seconds"
+
+_DISABLED = contextlib.nullcontext()
+_registry: Optional["Registry"] = None
+
+
+class Histogram:
+    """Count, sum, maximum and bucket counts of one span's durations."""
+
+    def __init__(self, buckets: Sequence[float] = BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def cumulative(self):
+        """Yield each bucket's upper bound with the observations at or below it."""
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class Span:
+    """Times one pass through a with block into its registry."""
+
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry: "Registry", name: str):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+
+
+class Registry:
+    """Histograms by span name, written out periodically by a writer thread."""
+
+    def __init__(self, path: str, interval: float = 10.0):
+        self.path = path
+        self.interval = interval
+        self.histograms: Dict[str, Histogram] = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.writer = threading.Thread(target=self._write_periodically, daemon=True)
+
+    def observe(self, name: str, seconds: float):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def prometheus_text(self) -> str:
+        lines = [
+            f"# HELP {METRIC} Time spent in instrumented spans of play.",
+            f"# TYPE {METRIC} histogram",
+        ]
+        with self.lock:
+            for name, histogram in sorted(self.histograms.items()):
+                for bound, total in histogram.cumulative():
+                    le = "+Inf" if bound == math.inf else repr(bound)
+                    lines.append(f'{METRIC}_bucket{{span="{name}",le="{le}"}} {total}')
+                lines.append(f'{METRIC}_sum{{span="{name}"}} {histogram.sum!r}')
+                lines.append(f'{METRIC}_count{{span="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict:
+        """Return every histogram as plain data, for the JSON lines file."""
+        with self.lock:
+            return {
+                "time": time.time(),
+                "spans": {
+                    name: {
+                        "count": h.count,
+                        "sum": h.sum,
+                        "max": h.max,
+                        "buckets": {
+                            "+Inf" if bound == math.inf else repr(bound): total
+                            for bound, total in h.cumulative()
+                        },
+                    }
+                    for name, h in sorted(self.histograms.items())
+                },
+            }
+
+    def write(self):
+        """Replace PATH.prom atomically and append a line to PATH.jsonl."""
+        staging = f"{self.path}.prom.tmp"
+        with open(staging, "w") as prom:
+            prom.write(self.prometheus_text())
+        os.replace(staging, f"{self.path}.prom")
+        with open(f"{self.path}.jsonl", "a") as lines:
+            lines.write(json.dumps(self.snapshot()) + "\n")
+
+    def _write_periodically(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
+
+    def close(self):
+        """Stop the writer thread and write a last time."""
+        if not self.stopped.is_set():
+            self.stopped.set()
+            self.write()
+
+
+def span(name: str):
+    """Return a context manager timing its block as span name, if enabled."""
+    registry = _registry
+    return _DISABLED if registry is None else Span(registry, name)
+
+
+def timed(name: str, func: Callable, *args, **kwargs):
+    """Call func, timing the call as span name."""
+    with span(name):
+        return func(*args, **kwargs)
+
+
+def enable(path: str, interval: float = 10.0) -> Registry:
+    """Start recording spans, writing them to PATH.prom and PATH.jsonl."""
+    global _registry
+    disable()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    _registry = Registry(path, interval)
+    _registry.writer.start()
+    atexit.register(_registry.close)
+    return _registry
+
+
+def disable():
+    """Stop recording spans, writing out what was recorded."""
+    global _registry
+    registry, _registry = _registry, None
+    if registry is not None:
+        registry.close()
+        atexit.unregister(registry.close)
@@ -1,19 +1,35 @@
+import argparse
 from blessed import Terminal
 from matrix_views import MatrixView
 from combat import HVCCombat
-from rich.traceback import install
+from render import RenderScheduler
+from startup import lazy_tracebacks
+import metrics
 
-install(show_locals=True)
+lazy_tracebacks()
 
 term = Terminal()
 
 
-def main():
+def main(max_fps: float = 0):
     view = MatrixView(term)
+    if max_fps:
+        view = RenderScheduler(view, max_fps)
     ctrl = HVCCombat(view, False)
     ctrl.run()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--max-fps", type=float, default=0, help="Coalesce redraws to this frame rate."
+    )
+    parser.add_argument(
+        "--metrics",
+        help="Write span timings to METRICS.prom and METRICS.jsonl, see metrics.py.",
+    )
+    args = parser.parse_args()
+    if args.metrics:
+        metrics.enable(args.metrics)
     with term.hidden_cursor():
-        main()
+        main(args.max_fps)
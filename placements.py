@@ -0,0 +1,229 @@
+import functools
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+import fleet
+from fleet import Point, Ship
+
+CACHE_VERSION = 1
+CACHE_DIR = os.environ.get(
+    "BATTLESHIP_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "battleship")
+)
+
+# Per placement its length, start, horiz, flat cells (-1 padded) and packed cell
+# mask, and per cell the placements covering it, see PlacementIndex.covering
+_TABLES = ("length", "x", "y", "horiz", "cells", "bits", "cell_offsets", "cell_placements")
+
+
+def packed_mask(mask: int, size: int) -> np.ndarray:
+    """Convert an integer bitmask (bit y * size + x) to packed little-endian bytes."""
+    return np.frombuffer(mask.to_bytes((size * size + 7) // 8, "little"), np.uint8)
+
+
+class PlacementIndex:
+    """Every legal placement of every ship length on a square board, as tables."""
+
+    def __init__(self, size: int, lengths: Tuple[int, ...], tables: Dict):
+        self.size = size
+        self.lengths = lengths
+        for name in _TABLES:
+            setattr(self, name, tables[name])
+        self.length_ranges = {}
+        start = 0
+        for length in lengths:
+            count = self.per_orientation(length) * 2
+            self.length_ranges[length] = (start, start + count)
+            start += count
+
+    def per_orientation(self, length: int) -> int:
+        return self.size * max(self.size - length + 1, 0)
+
+    @classmethod
+    def build(cls, size: int, lengths: Tuple[int, ...]) -> "PlacementIndex":
+        """Enumerate placements with array operations rather than Ship objects."""
+        max_length = max(lengths, default=0)
+        columns = {name: [] for name in ("length", "x", "y", "horiz", "cells")}
+        for length in lengths:
+            span = size - length + 1
+            if span < 1:
+                continue
+            offsets = np.arange(length)
+            for horiz in (True, False):
+                if horiz:
+                    ys, xs = np.mgrid[0:span, 0:size]
+                    step = size
+                else:
+                    ys, xs = np.mgrid[0:size, 0:span]
+                    step = 1
+                xs, ys = xs.ravel(), ys.ravel()
+                cells = np.full((len(xs), max_length), -1, dtype=np.int32)
+                cells[:, :length] = (ys * size + xs)[:, None] + offsets * step
+                columns["length"].append(np.full(len(xs), length, dtype=np.int16))
+                columns["x"].append(xs.astype(np.int32))
+                columns["y"].append(ys.astype(np.int32))
+                columns["horiz"].append(np.full(len(xs), horiz))
+                columns["cells"].append(cells)
+        tables = {
+            name: np.concatenate(parts)
+            if parts
+            else np.zeros((0, max_length) if name == "cells" else 0, dtype=np.int32)
+            for name, parts in columns.items()
+        }
+        cells = tables["cells"]
+        ids = np.repeat(np.arange(len(cells), dtype=np.int32), cells.shape[1])
+        flat = cells.ravel()
+        used = flat >= 0
+        dense = np.zeros((len(cells), size * size), dtype=bool)
+        dense[ids[used], flat[used]] = True
+        tables["bits"] = np.packbits(dense, axis=1, bitorder="little")
+        order = np.argsort(flat[used], kind="stable")
+        tables["cell_placements"] = ids[used][order]
+        tables["cell_offsets"] = np.concatenate(
+            ([0], np.cumsum(np.bincount(flat[used], minlength=size * size)))
+        ).astype(np.int64)
+        return cls(size, lengths, tables)
+
+    @staticmethod
+    def cache_path(size: int, lengths: Tuple[int, ...]) -> str:
+        ruleset = "-".join(map(str, lengths))
+        return os.path.join(CACHE_DIR, f"placements-v{CACHE_VERSION}-{size}-{ruleset}")
+
+    @classmethod
+    def load(cls, size: int, lengths: Tuple[int, ...]) -> "PlacementIndex":
+        """Memory-map the cached index, building and saving it on first use."""
+        path = cls.cache_path(size, lengths)
+        try:
+            tables = {
+                name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                for name in _TABLES
+            }
+            return cls(size, lengths, tables)
+        except (OSError, ValueError):
+            pass
+        index = cls.build(size, lengths)
+        index.save(path)
+        return index
+
+    def save(self, path: str):
+        """Write tables to path atomically, quietly skipping unwritable caches."""
+        staging = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            staging = tempfile.mkdtemp(dir=os.path.dirname(path))
+            for name in _TABLES:
+                np.save(os.path.join(staging, f"{name}.npy"), getattr(self, name))
+            os.replace(staging, path)
+        except OSError:
+            # Cache unavailable or another process saved it first
+            if staging:
+                shutil.rmtree(staging, ignore_errors=True)
+
+    def placement_id(self, length: int, start: Point, horiz: bool) -> Optional[int]:
+        """Return id of placement, or None if it reaches off the board."""
+        # Ids run by length, then ship_horiz placements (down the board, as in
+        # Ship) before those across, each by start row then column
+        if length not in self.length_ranges:
+            return None
+        span = self.size - length + 1
+        first = self.length_ranges[length][0]
+        if horiz:
+            if 0 <= start.x < self.size and 0 <= start.y < span:
+                return first + start.y * self.size + start.x
+        elif 0 <= start.x < span and 0 <= start.y < self.size:
+            return first + self.per_orientation(length) + start.y * span + start.x
+        return None
+
+    def mask(self, placement: int) -> int:
+        """Return placement's cells as an integer bitmask."""
+        return int.from_bytes(self.bits[placement].tobytes(), "little")
+
+    def covering(self, cell: int) -> np.ndarray:
+        """Return ids of placements covering flat cell index y * size + x."""
+        return self.cell_placements[self.cell_offsets[cell] : self.cell_offsets[cell + 1]]
+
+    def fitting(self, length: int, blocked: np.ndarray) -> np.ndarray:
+        """Return ids of placements of length touching no cell of packed blocked."""
+        first, last = self.length_ranges.get(length, (0, 0))
+        clear = ~np.any(self.bits[first:last] & blocked, axis=1)
+        return np.flatnonzero(clear) + first
+
+    def ship(self, placement: int, ship_type: str) -> Ship:
+        """Build the Ship for a placement."""
+        return Ship(
+            ship_type=ship_type,
+            ship_size=int(self.length[placement]),
+            ship_start=Point(int(self.x[placement]), int(self.y[placement])),
+            ship_horiz=bool(self.horiz[placement]),
+        )
+
+
+def random_layouts(
+    count: int,
+    size: int = fleet.GRID_SIZE,
+    ships: Dict[str, int] = fleet.ship_sizes,
+    rng: Optional[np.random.Generator] = None,
+    chunk_bytes: int = 1 << 26,
+) -> np.ndarray:
+    """Return count random fleet layouts, a row of placement ids per layout."""
+    rng = rng or np.random.default_rng()
+    index = get_index(size, ships.values())
+    layouts = np.empty((count, len(ships)), dtype=np.int32)
+    row_bytes = max(index.bits.shape[1], 1) * max(len(index.length), 1)
+    rows = max(chunk_bytes // row_bytes, 1)
+    for start in range(0, count, rows):
+        stop = min(start + rows, count)
+        layouts[start:stop] = _deal_layouts(index, ships, stop - start, rng)
+    return layouts
+
+
+def _deal_layouts(
+    index: PlacementIndex, ships: Dict[str, int], count: int, rng: np.random.Generator
+) -> np.ndarray:
+    layouts = np.empty((count, len(ships)), dtype=np.int32)
+    pending = np.arange(count)
+    # Every board at once, each ship uniformly among the placements still free
+    while len(pending):
+        taken = np.zeros((len(pending), index.bits.shape[1]), dtype=np.uint8)
+        dealt = np.ones(len(pending), dtype=bool)
+        for column, length in enumerate(ships.values()):
+            first, last = index.length_ranges.get(length, (0, 0))
+            if first == last:
+                raise ValueError(f"A ship of length {length} can't fit on the board.")
+            bits = index.bits[first:last]
+            clashes = np.any(bits[None, :, :] & taken[:, None, :], axis=2)
+            keys = rng.random(clashes.shape)
+            keys[clashes] = -1
+            choice = np.argmax(keys, axis=1)
+            dealt &= keys[np.arange(len(pending)), choice] >= 0
+            layouts[pending, column] = choice + first
+            taken |= bits[choice]
+        # The rare boards with no room left for a later ship are dealt again
+        pending = pending[~dealt]
+    return layouts
+
+
+def layout_ships(
+    index: PlacementIndex, layout: np.ndarray, ships: Dict[str, int] = fleet.ship_sizes
+) -> Iterable[Ship]:
+    """Yield the Ships of one layout row, ready for Fleet.add_ship."""
+    for ship_type, placement in zip(ships, layout):
+        yield index.ship(int(placement), ship_type)
+
+
+def layout_cells(index: PlacementIndex, layouts: np.ndarray) -> np.ndarray:
+    """Return cells covered by each ship of each layout, -1 padded."""
+    return index.cells[layouts]
+
+
+def get_index(size: int, lengths: Iterable[int]) -> PlacementIndex:
+    """Return the shared placement index for a board size and set of ship lengths."""
+    return _get_index(size, tuple(sorted(set(lengths))))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_index(size: int, lengths: Tuple[int, ...]) -> PlacementIndex:
+    return PlacementIndex.load(size, lengths)
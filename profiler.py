@@ -0,0 +1,185 @@
+"""Sample where time goes while whole games play, and write flamegraph input."""
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+from types import CodeType, FrameType
+from typing import Dict, List, Optional
+
+import combat
+import targeting
+import views
+from fleet import GRID_SIZE
+
+# Samples in which a function was innermost, and in which it was anywhere
+FunctionTime = namedtuple("FunctionTime", ["function", "self_samples", "total_samples"])
+
+
+class Sampler:
+    """Samples one thread's call stack from a background thread."""
+
+    def __init__(self, interval: float = 0.001, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.labels: Dict[CodeType, str] = {}
+        self.elapsed = 0.0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+        self.switch_interval = sys.getswitchinterval()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        # So a busy thread hands over the GIL often enough to be sampled on time
+        sys.setswitchinterval(min(self.switch_interval, self.interval))
+        self.started = time.perf_counter()
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        sys.setswitchinterval(self.switch_interval)
+
+    def _label(self, frame: FrameType) -> str:
+        code = frame.f_code
+        label = self.labels.get(code)
+        if label is None:
+            module = frame.f_globals.get("__name__", "?")
+            # co_qualname is new in Python 3.11
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self.labels[code] = f"{module}.{name}"
+        return label
+
+    def _sample(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> List[str]:
+        """Return each stack as frames joined by ; and its count, for flamegraphs."""
+        return [
+            f"{';'.join(stack)} {count}"
+            for stack, count in sorted(self.stacks.items())
+        ]
+
+    def function_times(self) -> List[FunctionTime]:
+        """Return every sampled function, by self samples, most first."""
+        self_samples: Counter = Counter()
+        total_samples: Counter = Counter()
+        for stack, count in self.stacks.items():
+            self_samples[stack[-1]] += count
+            for function in set(stack):
+                total_samples[function] += count
+        return sorted(
+            (
+                FunctionTime(function, self_samples[function], total)
+                for function, total in total_samples.items()
+            ),
+            key=lambda f: (-f.self_samples, -f.total_samples, f.function),
+        )
+
+
+def play_games(
+    games: int,
+    seed: int,
+    strategy: str,
+    human_strategy: str,
+    size: int = GRID_SIZE,
+) -> Counter:
+    """Play games of human against computer without a terminal, counting winners."""
+    winners: Counter = Counter()
+    for game in range(games):
+        # Fleets and ship placement draw from the random module
+        random.seed(f"{seed}:{game}")
+        view = views.NullView(targeting.STRATEGIES[human_strategy])
+        game_combat = combat.HVCCombat(
+            view,
+            audio_on=False,
+            strategy=targeting.STRATEGIES[strategy],
+            size=size,
+            think_time=0,
+            show_progress=False,
+        )
+        game_combat.run()
+        winners[view.winner] += 1
+    return winners
+
+
+def format_table(
+    times: List[FunctionTime], samples: int, seconds: float, top: int
+) -> str:
+    """Tabulate the top functions, estimating seconds from their share of samples."""
+    per_sample = seconds / max(samples, 1)
+    lines = [f"{'self':>9} {'self %':>7} {'total':>9} {'total %':>7}  function"]
+    for entry in times[:top]:
+        lines.append(
+            f"{entry.self_samples * per_sample:8.3f}s"
+            f"{100 * entry.self_samples / samples:7.1f}%"
+            f"{entry.total_samples * per_sample:9.3f}s"
+            f"{100 * entry.total_samples / samples:7.1f}%  {entry.function}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", type=int, default=GRID_SIZE)
+    parser.add_argument(
+        "--strategy",
+        choices=targeting.STRATEGIES,
+        default="montecarlo",
+        help="How the computer picks its shots.",
+    )
+    parser.add_argument(
+        "--human-strategy",
+        choices=targeting.STRATEGIES,
+        default="classic",
+        help="How shots are picked for the human.",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=0.001, help="Seconds between samples."
+    )
+    parser.add_argument("--out", default="profile.collapsed")
+    parser.add_argument("--top", type=int, default=25, help="Functions to list.")
+    args = parser.parse_args()
+
+    with Sampler(args.interval) as sampler:
+        winners = play_games(
+            args.games, args.seed, args.strategy, args.human_strategy, args.size
+        )
+    with open(args.out, "w") as out:
+        out.write("\n".join(sampler.collapsed()) + "\n")
+
+    samples = sampler.samples
+    print(
+        format_table(sampler.function_times(), samples, sampler.elapsed, args.top)
+    )
+    wins = ", ".join(f"{winner} {count}" for winner, count in winners.most_common())
+    print(
+        f"{args.games} games ({wins}) in {sampler.elapsed:.1f}s, "
+        f"{samples} samples, stacks written to {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
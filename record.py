@@ -0,0 +1,380 @@
+"""Compact binary game records, and replay of them through fleets and views."""
+import argparse
+import os
+import time
+from collections import namedtuple
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple, Union
+
+import fleet
+from fleet import Fleet, Point, Ship
+
+# A header naming the ship types, then a varint length-prefixed frame per game
+MAGIC = b"BSGR"
+VERSION = 1
+SHIP_TYPES = tuple(fleet.ship_sizes)
+PLAYERS = ("A", "B")
+
+# Shot flags, packed below the square fired upon
+PLAYER_B = 1
+HIT = 2
+SUNK = 4
+DEFEATED = 8
+FLAG_BITS = 4
+
+Placement = namedtuple("Placement", ["ship_type", "ship_size", "x", "y", "horiz"])
+Shot = namedtuple("Shot", ["player", "x", "y", "hit", "sunk", "defeated"])
+# fleets holds the Placements of fleet A then fleet B, player A fires first
+GameRecord = namedtuple("GameRecord", ["seed", "size", "fleets", "shots"])
+
+
+def put_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def get_varint(data, pos: int) -> Tuple[int, int]:
+    """Return varint at pos of data and the position after it."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _put_text(out: bytearray, text: str):
+    raw = text.encode("utf-8")
+    put_varint(out, len(raw))
+    out += raw
+
+
+def _get_text(data, pos: int) -> Tuple[str, int]:
+    length, pos = get_varint(data, pos)
+    return bytes(data[pos : pos + length]).decode("utf-8"), pos + length
+
+
+def ship_placement(ship: Ship) -> Placement:
+    return Placement(
+        ship.ship_type,
+        ship.ship_size,
+        ship.ship_start.x,
+        ship.ship_start.y,
+        ship.ship_horiz,
+    )
+
+
+def fleet_placements(flt: Fleet) -> List[Placement]:
+    """Return placements of a fleet's anchored ships, in a stable order."""
+    return [
+        ship_placement(ship)
+        for ship in sorted(flt.ships, key=lambda s: (s.ship_type, s.ship_start))
+        if not ship.ship_temp
+    ]
+
+
+def game_ship_types(game: GameRecord) -> Tuple[str, ...]:
+    """Return the ship types placed in a game, in order of first placement."""
+    return tuple(
+        dict.fromkeys(p.ship_type for placements in game.fleets for p in placements)
+    )
+
+
+def shot_record(player: int, point: Point, result: Tuple[bool, str, bool]) -> Shot:
+    """Return a Shot for player (0 for A) firing at point with take_fire's result."""
+    hit, sunk, defeated = result
+    return Shot(player, point.x, point.y, hit, bool(sunk), defeated)
+
+
+def header(ship_types: Sequence[str] = SHIP_TYPES) -> bytes:
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    put_varint(out, len(ship_types))
+    for ship_type in ship_types:
+        _put_text(out, ship_type)
+    return bytes(out)
+
+
+def encode_game(game: GameRecord, ship_types: Sequence[str] = SHIP_TYPES) -> bytes:
+    """Return the length-prefixed frame of one game."""
+    type_ids = {ship_type: i for i, ship_type in enumerate(ship_types)}
+    unknown = set(game_ship_types(game)) - set(type_ids)
+    if unknown:
+        raise ValueError(f"Ship types {sorted(unknown)} aren't in {ship_types}.")
+    size = game.size
+    body = bytearray()
+    _put_text(body, str(game.seed))
+    put_varint(body, size)
+    for placements in game.fleets:
+        put_varint(body, len(placements))
+        for placement in placements:
+            put_varint(body, type_ids[placement.ship_type])
+            put_varint(body, placement.ship_size)
+            put_varint(body, (placement.y * size + placement.x) << 1 | placement.horiz)
+    put_varint(body, len(game.shots))
+    for shot in game.shots:
+        flags = (
+            shot.player * PLAYER_B
+            | shot.hit * HIT
+            | shot.sunk * SUNK
+            | shot.defeated * DEFEATED
+        )
+        put_varint(body, (shot.y * size + shot.x) << FLAG_BITS | flags)
+    frame = bytearray()
+    put_varint(frame, len(body))
+    return bytes(frame + body)
+
+
+def decode_game(data, pos: int, ship_types: Sequence[str] = SHIP_TYPES) -> GameRecord:
+    """Decode the body of one game frame starting at pos."""
+    seed, pos = _get_text(data, pos)
+    size, pos = get_varint(data, pos)
+    fleets = []
+    for _ in PLAYERS:
+        count, pos = get_varint(data, pos)
+        placements = []
+        for _ in range(count):
+            type_id, pos = get_varint(data, pos)
+            ship_size, pos = get_varint(data, pos)
+            packed, pos = get_varint(data, pos)
+            cell = packed >> 1
+            placements.append(
+                Placement(
+                    ship_types[type_id],
+                    ship_size,
+                    cell % size,
+                    cell // size,
+                    bool(packed & 1),
+                )
+            )
+        fleets.append(placements)
+    count, pos = get_varint(data, pos)
+    shots = []
+    for _ in range(count):
+        packed, pos = get_varint(data, pos)
+        cell = packed >> FLAG_BITS
+        shots.append(
+            Shot(
+                packed & PLAYER_B,
+                cell % size,
+                cell // size,
+                bool(packed & HIT),
+                bool(packed & SUNK),
+                bool(packed & DEFEATED),
+            )
+        )
+    return GameRecord(seed, size, tuple(fleets), shots)
+
+
+def read_header(file: BinaryIO) -> Tuple[str, ...]:
+    """Read a record file's header, returning its ship types."""
+    start = file.read(len(MAGIC) + 1)
+    if start[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not a game record file.")
+    if start[-1] != VERSION:
+        raise ValueError(f"Unsupported game record version {start[-1]}.")
+    data = bytearray()
+    while True:
+        # Grow until the whole table parses, it is small
+        chunk = file.read(256)
+        data += chunk
+        try:
+            count, pos = get_varint(data, 0)
+            ship_types = []
+            for _ in range(count):
+                ship_type, pos = _get_text(data, pos)
+                if pos > len(data):
+                    raise IndexError
+                ship_types.append(ship_type)
+        except IndexError:
+            if not chunk:
+                raise ValueError("Truncated game record header.")
+            continue
+        file.seek(len(MAGIC) + 1 + pos)
+        return tuple(ship_types)
+
+
+def read_frames(path: str, chunk_size: int = 1 << 16) -> Iterator[Tuple[bytes, int]]:
+    """Yield the file's ship types, then a buffer and start of each game's body."""
+    with open(path, "rb") as file:
+        yield read_header(file)
+        # A chunk at a time, so skipping games costs no decoding
+        buffer = b""
+        pos = 0
+        while True:
+            chunk = file.read(chunk_size)
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            while pos < len(buffer):
+                try:
+                    length, start = get_varint(buffer, pos)
+                except IndexError:
+                    break
+                if start + length > len(buffer):
+                    break
+                yield buffer, start
+                pos = start + length
+            if not chunk:
+                if pos < len(buffer):
+                    raise ValueError(f"Truncated game at end of {path}.")
+                return
+
+
+def read_games(path: str, chunk_size: int = 1 << 16) -> Iterator[GameRecord]:
+    """Yield each game of a record file in order, reading it a chunk at a time."""
+    frames = read_frames(path, chunk_size)
+    ship_types = next(frames)
+    for buffer, start in frames:
+        yield decode_game(buffer, start, ship_types)
+
+
+class GameWriter:
+    """Appends games to a record file, a new file naming the first game's ships."""
+
+    def __init__(self, path: str, ship_types: Optional[Sequence[str]] = None):
+        self.ship_types = None if ship_types is None else tuple(ship_types)
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as existing:
+                recorded = read_header(existing)
+            if self.ship_types not in (None, recorded):
+                raise ValueError(f"{path} records other ship types.")
+            self.ship_types = recorded
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "wb")
+            if self.ship_types is not None:
+                self.file.write(header(self.ship_types))
+        self.games = 0
+
+    def write(self, game: Union[GameRecord, bytes]):
+        """Append a game, given as a GameRecord or a frame from encode_game."""
+        if self.ship_types is None:
+            # Frames were encoded against the default table
+            is_record = isinstance(game, GameRecord)
+            self.ship_types = game_ship_types(game) if is_record else SHIP_TYPES
+            self.file.write(header(self.ship_types))
+        if isinstance(game, GameRecord):
+            game = encode_game(game, self.ship_types)
+        self.file.write(game)
+        self.games += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_fleets(game: GameRecord, fleet_type=Fleet) -> Tuple[Fleet, Fleet]:
+    """Return fleets A and B with the game's ships anchored, under its ruleset."""
+    ships = {p.ship_type: p.ship_size for placements in game.fleets for p in placements}
+    if ships == fleet.ship_sizes:
+        ships = None
+    rules = fleet.get_ruleset(game.size, ships)
+    fleets = []
+    for player, placements in zip(PLAYERS, game.fleets):
+        flt = fleet_type(f"Fleet {player}", rules=rules)
+        for placement in placements:
+            flt.add_ship(
+                Ship(
+                    placement.ship_type,
+                    placement.ship_size,
+                    Point(placement.x, placement.y),
+                    placement.horiz,
+                )
+            )
+        fleets.append(flt)
+    return fleets[0], fleets[1]
+
+
+def replay(
+    game: GameRecord, fleet_type=Fleet, view=None, delay: float = 0.0
+) -> Iterator[Tuple[Shot, Fleet]]:
+    """Fire each recorded shot at fresh fleets, yielding it with the fleet it hit."""
+    if view:
+        import views
+
+    fleets = build_fleets(game, fleet_type)
+    for turn, shot in enumerate(game.shots):
+        target = fleets[1 - shot.player]
+        if delay:
+            time.sleep(delay)
+        hit, sunk, defeated = target.take_fire(Point(shot.x, shot.y))
+        # A differing result means the fleets or engine aren't the recorded ones
+        if (hit, bool(sunk), defeated) != (shot.hit, shot.sunk, shot.defeated):
+            raise ValueError(
+                f"Shot {turn} of game {game.seed} at ({shot.x}, {shot.y}) gave "
+                f"{(hit, sunk, defeated)}, recorded {shot[3:]}."
+            )
+        # Shown as a human vs computer game would be, player A on the left
+        if view:
+            side = PLAYERS[shot.player]
+            other = PLAYERS[1 - shot.player]
+            location = f"{fleet.heading(shot.y).upper()}-{shot.x + 1}"
+            feedback = f"{'Hit' if hit else 'Miss'} at {location}!"
+            if sunk:
+                feedback = f"{side}: You sunk my {sunk}!"
+            view.display_grid(target.ships_grid(False), False, views.Areas[f"{side}G"])
+            view.display_grid(target.ships_grid(True), True, views.Areas[f"{other}S"])
+            view.display_text(feedback, views.Areas[f"{side}F"])
+            if defeated:
+                view.show_game_over(f"Player {side}")
+        yield shot, target
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", help="Game record file.")
+    parser.add_argument("--game", type=int, help="Replay only game number GAME.")
+    parser.add_argument(
+        "--show", action="store_true", help="Replay into the terminal view."
+    )
+    parser.add_argument(
+        "--delay", type=float, default=0.0, help="Seconds to pause before each shot."
+    )
+    parser.add_argument(
+        "--sparse",
+        action="store_true",
+        help="Replay on sparse fleets, for huge boards.",
+    )
+    args = parser.parse_args()
+
+    def fleet_type(name, rules):
+        return Fleet(name, sparse=args.sparse, rules=rules)
+
+    view = None
+    if args.show:
+        from blessed import Terminal
+
+        import views
+
+        view = views.RichView(Terminal())
+    games = shots = 0
+    start = time.perf_counter()
+    frames = read_frames(args.path)
+    ship_types = next(frames)
+    for number, (buffer, body) in enumerate(frames):
+        if args.game is not None and number != args.game:
+            continue
+        game = decode_game(buffer, body, ship_types)
+        for _ in replay(game, fleet_type, view, args.delay):
+            shots += 1
+        games += 1
+        if args.game is not None:
+            print(f"Game {number}: seed {game.seed!r}, {len(game.shots)} shots")
+            break
+    elapsed = time.perf_counter() - start
+    print(
+        f"Replayed {games} games, {shots} shots in {elapsed:.2f}s "
+        f"({games / max(elapsed, 1e-9):.0f} games/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
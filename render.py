@@ -0,0 +1,85 @@
+import time
+from typing import Dict, Tuple
+
+from views import Areas
+
+# View methods that draw, queued per area and coalesced
+DRAWS = ("display_grid", "display_text", "update_area")
+# View methods that wait on the player, queued frames are painted first
+WAITS = ("get_direction",)
+
+
+class RenderScheduler:
+    """Sits between a controller and any view, coalescing its draws into frames."""
+
+    def __init__(self, view, max_fps: float = 30):
+        self.view = view
+        self.frame_interval = 1 / max_fps
+        self.last_frame = 0.0
+        self.pending: Dict[Areas, Tuple[str, tuple]] = {}
+        self.frames_flushed = 0
+        self.updates_flushed = 0
+        self.updates_dropped = 0
+        # MatrixView has no update_area, so only the draws a view has are queued
+        self.draws = {
+            method: getattr(view, method) for method in DRAWS if hasattr(view, method)
+        }
+        for method in self.draws:
+            setattr(view, method, getattr(self, method))
+        for method in WAITS:
+            if hasattr(view, method):
+                setattr(view, method, self._flushed_first(getattr(view, method)))
+
+    def display_grid(self, grid, show_ships: bool, area: Areas):
+        self.queue(area, "display_grid", (grid, show_ships, area))
+
+    def display_text(self, text: str, ar: Areas):
+        self.queue(ar, "display_text", (text, ar))
+
+    def update_area(self, area: Areas, text):
+        self.queue(area, "update_area", (area, text))
+
+    def queue(self, area: Areas, method: str, args: tuple):
+        """Queue a display call, painting the frame now if one is due."""
+        if area in self.pending:
+            self.updates_dropped += 1
+        self.pending[area] = (method, args)
+        if time.monotonic() - self.last_frame >= self.frame_interval:
+            self.paint()
+
+    def paint(self):
+        """Apply every queued display call to the view as one frame."""
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        for method, args in pending.values():
+            self.draws[method](*args)
+        self.updates_flushed += len(pending)
+        self.frames_flushed += 1
+        self.last_frame = time.monotonic()
+
+    def flush(self):
+        """Paint queued display calls, and anything the view itself held back."""
+        self.paint()
+        self.view.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "frames_flushed": self.frames_flushed,
+            "updates_flushed": self.updates_flushed,
+            "updates_dropped": self.updates_dropped,
+        }
+
+    def _flushed_first(self, method):
+        def flushed_first(*args, **kwargs):
+            self.flush()
+            return method(*args, **kwargs)
+
+        return flushed_first
+
+    def __getattr__(self, name):
+        """Pass other view methods through, flushing queued frames first."""
+        attr = getattr(self.view, name)
+        if not callable(attr):
+            return attr
+        return self._flushed_first(attr)
@@ -0,0 +1,564 @@
+"""Asyncio match server hosting many games at once over a JSON lines protocol."""
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import random
+from typing import Callable, Dict, List, Optional, Set
+
+from loguru import logger
+
+import fleet
+import metrics
+import record
+import targeting
+from fleet import Fleet, Point, Ship
+
+PROTOCOL_VERSION = 1
+MAX_LINE = 1 << 16
+SEND_QUEUE = 256
+MAX_SIZE = 100
+# Pending connections the OS queues, enough for thousands of clients at once
+BACKLOG = 4096
+HUMAN = "human"
+# Seconds a slow AI strategy may take over a shot
+AI_THINK_TIME = 0.1
+
+
+class ProtocolError(Exception):
+    """Request a client may not make, reported back to it as an error event."""
+
+
+class Connection:
+    """One client, with a queue of outgoing lines so slow readers can't stall play."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        # Allocated up front, but holds only lines not yet written
+        self.outgoing: asyncio.Queue = asyncio.Queue(SEND_QUEUE)
+        self.match: Optional["Match"] = None
+        self.seat: Optional[int] = None
+        self.closed = False
+        self.sender = asyncio.create_task(self.send_lines())
+
+    def send(self, message: dict):
+        """Queue a message, disconnecting the client if its queue is full."""
+        if self.closed:
+            return
+        try:
+            self.outgoing.put_nowait(json.dumps(message).encode() + b"\n")
+        except asyncio.QueueFull:
+            logger.warning("Dropping client too slow to read its events")
+            self.close()
+
+    async def send_lines(self):
+        """Write queued lines, batching any backlog, and wait for the socket."""
+        try:
+            while True:
+                lines = [await self.outgoing.get()]
+                while not self.outgoing.empty():
+                    lines.append(self.outgoing.get_nowait())
+                self.writer.write(b"".join(lines))
+                await self.writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.writer.close()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.sender.cancel()
+
+
+class Match:
+    """One game between two seats, each a human connection or an AI strategy."""
+
+    def __init__(
+        self,
+        match_id: str,
+        seats: List[str],
+        size: int,
+        seed,
+        ai_delay: float,
+        recorder: Optional[record.GameWriter] = None,
+        on_over: Optional[Callable[["Match"], None]] = None,
+    ):
+        self.match_id = match_id
+        self.kinds = seats
+        self.size = size
+        self.seed = seed
+        self.ai_delay = ai_delay
+        self.recorder = recorder
+        self.on_over = on_over
+        self.rules = fleet.get_ruleset(size)
+        rng = random.Random(seed)
+        self.fleets = [
+            Fleet(f"Seat {seat}", rng=rng, rules=self.rules) for seat in (0, 1)
+        ]
+        self.players: List[Optional[Connection]] = [None, None]
+        self.spectators: Set[Connection] = set()
+        self.placed = [False, False]
+        self.turn = 0
+        self.started = False
+        self.over = False
+        self.shots: List[record.Shot] = []
+        self.ai_task: Optional[asyncio.Task] = None
+        for seat, kind in enumerate(seats):
+            if kind != HUMAN:
+                self.fleets[seat].deploy_computer_fleet(show_progress=False)
+                self.placed[seat] = True
+
+    def open_seat(self) -> Optional[int]:
+        """Return the first human seat without a player, if any."""
+        for seat, kind in enumerate(self.kinds):
+            if kind == HUMAN and self.players[seat] is None:
+                return seat
+        return None
+
+    def broadcast(self, message: dict):
+        message["match"] = self.match_id
+        for conn in self.players:
+            if conn:
+                conn.send(message)
+        for conn in self.spectators:
+            conn.send(message)
+
+    def sit(self, conn: Connection) -> int:
+        seat = self.open_seat()
+        if seat is None:
+            raise ProtocolError("Match has no open seat.")
+        self.players[seat] = conn
+        conn.match, conn.seat = self, seat
+        return seat
+
+    def watch(self, conn: Connection):
+        self.spectators.add(conn)
+        conn.match, conn.seat = self, None
+
+    def place(self, seat: int, ships: Optional[List[dict]]):
+        """Anchor a human seat's ships, at random when none are given."""
+        if self.placed[seat]:
+            raise ProtocolError("Ships are already placed.")
+        flt = Fleet(f"Seat {seat}", rng=self.fleets[seat].rng, rules=self.rules)
+        if ships is None:
+            flt.deploy_computer_fleet(show_progress=False)
+        else:
+            if not isinstance(ships, list) or not all(
+                isinstance(ship, dict) for ship in ships
+            ):
+                raise ProtocolError("Ships must be a list of objects.")
+            types = sorted(str(ship.get("type")) for ship in ships)
+            ship_sizes = self.rules.ship_sizes
+            if types != sorted(ship_sizes):
+                raise ProtocolError(f"Place one of each of {list(ship_sizes)}.")
+            for ship in ships:
+                try:
+                    placed = Ship(
+                        ship["type"],
+                        ship_sizes[ship["type"]],
+                        Point(int(ship["x"]), int(ship["y"])),
+                        bool(ship["horiz"]),
+                    )
+                except (KeyError, TypeError, ValueError):
+                    raise ProtocolError("Ships need type, x, y and horiz.")
+                if not (
+                    fleet.point_valid(placed.ship_start, self.size)
+                    and flt.valid_anchor(placed)
+                ):
+                    raise ProtocolError(f"{placed.ship_type} doesn't fit there.")
+                flt.add_ship(placed)
+        self.fleets[seat] = flt
+        self.placed[seat] = True
+        self.players[seat].send(
+            {
+                "event": "placed",
+                "match": self.match_id,
+                "ships": [p._asdict() for p in record.fleet_placements(flt)],
+            }
+        )
+        self.start_if_ready()
+
+    def start_if_ready(self):
+        if self.started or not all(self.placed):
+            return
+        if self.open_seat() is not None:
+            return
+        self.started = True
+        self.broadcast(
+            {
+                "event": "start",
+                "size": self.size,
+                "seats": self.kinds,
+                "turn": self.turn,
+            }
+        )
+        self.run_ai()
+
+    def fire(self, seat: int, point: Point):
+        """Resolve a shot by seat and tell everyone watching."""
+        if not self.started or self.over:
+            raise ProtocolError("Match isn't in play.")
+        if seat != self.turn:
+            raise ProtocolError("Not your turn.")
+        target = self.fleets[1 - seat]
+        if not fleet.point_valid(point, self.size):
+            raise ProtocolError("Shot is off the board.")
+        if target.at_point(point) in self.rules.hit_chars:
+            raise ProtocolError("Already fired there.")
+        with metrics.span("take_fire"):
+            result = target.take_fire(point)
+        hit, sunk, defeated = result
+        self.shots.append(record.shot_record(seat, point, result))
+        self.turn = 1 - seat
+        shot = {
+            "event": "shot",
+            "seat": seat,
+            "x": point.x,
+            "y": point.y,
+            "hit": hit,
+            "sunk": sunk,
+            "defeated": defeated,
+            "turn": self.turn,
+        }
+        if sunk:
+            shot["ship"] = record.ship_placement(target.ship_at[point])._asdict()
+        self.broadcast(shot)
+        if defeated:
+            self.finish(seat, "sunk")
+        else:
+            self.run_ai()
+
+    def finish(self, winner: int, reason: str):
+        """End the match, releasing everyone in it to start or join another."""
+        self.over = True
+        self.broadcast({"event": "over", "winner": winner, "reason": reason})
+        for conn in [*self.players, *self.spectators]:
+            if conn:
+                conn.match, conn.seat = None, None
+        self.players = [None, None]
+        self.spectators.clear()
+        if self.on_over:
+            self.on_over(self)
+        if self.recorder and reason == "sunk":
+            self.recorder.write(
+                record.GameRecord(
+                    self.seed,
+                    self.size,
+                    tuple(record.fleet_placements(flt) for flt in self.fleets),
+                    self.shots,
+                )
+            )
+
+    def run_ai(self):
+        """Start playing AI turns, unless already doing so."""
+        if self.ai_task is None or self.ai_task.done():
+            self.ai_task = asyncio.create_task(self.ai_turns())
+
+    async def ai_turns(self):
+        while self.started and not self.over and self.kinds[self.turn] != HUMAN:
+            # Sleeping even for 0 lets other matches have the loop between shots
+            await asyncio.sleep(self.ai_delay)
+            if self.over:
+                return
+            kind = self.kinds[self.turn]
+            strategy = targeting.STRATEGIES[kind]
+            target = self.fleets[1 - self.turn]
+            if kind in targeting.SLOW_STRATEGIES:
+                strategy = functools.partial(strategy, budget=AI_THINK_TIME)
+                # Off the loop, so a slow strategy doesn't stall every other match
+                point = await asyncio.get_running_loop().run_in_executor(
+                    None, metrics.timed, "ai_decision", strategy, target
+                )
+                if self.over:
+                    return
+            else:
+                point = metrics.timed("ai_decision", strategy, target)
+            self.fire(self.turn, point)
+
+    def leave(self, conn: Connection):
+        """Remove conn from the match, a player leaving mid-game forfeits it."""
+        seat = conn.seat
+        if seat is not None and self.started and not self.over:
+            self.finish(1 - seat, "forfeit")
+            return
+        self.spectators.discard(conn)
+        if seat is not None and self.players[seat] is conn:
+            self.players[seat] = None
+            # The next player to take the seat places a fleet of their own
+            self.placed[seat] = False
+            self.fleets[seat] = Fleet(
+                f"Seat {seat}", rng=self.fleets[seat].rng, rules=self.rules
+            )
+        conn.match, conn.seat = None, None
+
+    @property
+    def abandoned(self) -> bool:
+        return not any(self.players) and not self.spectators
+
+
+class MatchServer:
+    """Accepts connections and routes their requests to isolated Matches."""
+
+    def __init__(
+        self,
+        ai_delay: float = 0.5,
+        max_size: int = MAX_SIZE,
+        recorder: Optional[record.GameWriter] = None,
+        seed=None,
+    ):
+        self.ai_delay = ai_delay
+        self.max_size = max_size
+        self.recorder = recorder
+        self.seed = random.randrange(1 << 32) if seed is None else seed
+        self.match_ids = itertools.count(1)
+        self.matches: Dict[str, Match] = {}
+        self.connections: Set[Connection] = set()
+        self.ops = {
+            "new": self.new_match,
+            "list": self.list_matches,
+            "join": self.join_match,
+            "watch": self.watch_match,
+            "place": self.place_ships,
+            "fire": self.fire,
+            "leave": self.leave,
+        }
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765):
+        """Start listening, returning the asyncio Server."""
+        return await asyncio.start_server(
+            self.handle, host, port, limit=MAX_LINE, backlog=BACKLOG
+        )
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        conn = Connection(reader, writer)
+        self.connections.add(conn)
+        conn.send({"event": "hello", "version": PROTOCOL_VERSION})
+        try:
+            while not conn.closed:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.dispatch(conn, line)
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            # ValueError is a line longer than MAX_LINE, cancellation is the
+            # server shutting down, which needn't log each connection
+            pass
+        finally:
+            self.disconnect(conn)
+
+    def dispatch(self, conn: Connection, line: bytes):
+        op = None
+        try:
+            try:
+                message = json.loads(line)
+                op = message["op"]
+                handler = self.ops[op]
+            except (ValueError, TypeError, KeyError):
+                raise ProtocolError("Send one JSON object with a known op per line.")
+            handler(conn, message)
+        except ProtocolError as err:
+            conn.send({"event": "error", "op": op, "message": str(err)})
+
+    def disconnect(self, conn: Connection):
+        if conn.match:
+            self.leave(conn, {})
+        conn.close()
+        self.connections.discard(conn)
+
+    def _match(self, message: dict) -> Match:
+        match = self.matches.get(str(message.get("match")))
+        if not match:
+            raise ProtocolError("No such match.")
+        return match
+
+    def _seat(self, conn: Connection) -> Match:
+        if not conn.match or conn.seat is None:
+            raise ProtocolError("Not seated in a match.")
+        return conn.match
+
+    def _free(self, conn: Connection):
+        if conn.match:
+            raise ProtocolError("Already in a match, leave it first.")
+
+    def new_match(self, conn: Connection, message: dict):
+        """Create a match of two seats, each "human" or an AI strategy."""
+        self._free(conn)
+        seats = message.get("seats", [HUMAN, "density"])
+        size = message.get("size", fleet.GRID_SIZE)
+        if (
+            not isinstance(seats, list)
+            or len(seats) != 2
+            or not all(isinstance(kind, str) for kind in seats)
+            or any(kind != HUMAN and kind not in targeting.STRATEGIES for kind in seats)
+        ):
+            raise ProtocolError(f"Seats are two of {[HUMAN, *targeting.STRATEGIES]}.")
+        if not isinstance(size, int) or not 5 <= size <= self.max_size:
+            raise ProtocolError(f"Size must be from 5 to {self.max_size}.")
+        match_id = str(next(self.match_ids))
+        match = Match(
+            match_id,
+            seats,
+            size,
+            f"{self.seed}:{match_id}",
+            self.ai_delay,
+            self.recorder,
+            self.drop_match,
+        )
+        self.matches[match_id] = match
+        if match.open_seat() is None:
+            match.watch(conn)
+        else:
+            match.sit(conn)
+        conn.send({"event": "created", "match": match_id, "seat": conn.seat})
+        match.start_if_ready()
+
+    def list_matches(self, conn: Connection, message: dict):
+        """List matches waiting for a human player."""
+        waiting = [
+            {"match": match.match_id, "seats": match.kinds, "size": match.size}
+            for match in self.matches.values()
+            if not match.started and match.open_seat() is not None
+        ]
+        conn.send({"event": "matches", "matches": waiting})
+
+    def join_match(self, conn: Connection, message: dict):
+        """Take a match's open human seat."""
+        self._free(conn)
+        match = self._match(message)
+        seat = match.sit(conn)
+        match.broadcast({"event": "joined", "seat": seat})
+        match.start_if_ready()
+
+    def watch_match(self, conn: Connection, message: dict):
+        """Receive a match's events, starting with the shots so far."""
+        self._free(conn)
+        match = self._match(message)
+        match.watch(conn)
+        conn.send(
+            {
+                "event": "watching",
+                "match": match.match_id,
+                "started": match.started,
+                "shots": [shot._asdict() for shot in match.shots],
+            }
+        )
+
+    def place_ships(self, conn: Connection, message: dict):
+        """Anchor every ship, or place them at random if ships is omitted."""
+        self._seat(conn).place(conn.seat, message.get("ships"))
+
+    def fire(self, conn: Connection, message: dict):
+        """Fire at x, y on your turn."""
+        try:
+            point = Point(int(message["x"]), int(message["y"]))
+        except (KeyError, TypeError, ValueError):
+            raise ProtocolError("Fire needs integer x and y.")
+        self._seat(conn).fire(conn.seat, point)
+
+    def leave(self, conn: Connection, message: dict):
+        """Leave the match, forfeiting it if it has started."""
+        match = conn.match
+        if not match:
+            raise ProtocolError("Not in a match.")
+        match.leave(conn)
+        if match.abandoned and not match.started:
+            self.drop_match(match)
+
+    def drop_match(self, match: Match):
+        self.matches.pop(match.match_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "connections": len(self.connections),
+            "matches": len(self.matches),
+            "playing": sum(m.started and not m.over for m in self.matches.values()),
+        }
+
+
+class MatchClient:
+    """Minimal client for scripts and tests driving a MatchServer."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = 8765):
+        reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+        client = cls(reader, writer)
+        await client.expect("hello")
+        return client
+
+    async def send(self, op: str, **fields):
+        fields["op"] = op
+        self.writer.write(json.dumps(fields).encode() + b"\n")
+        await self.writer.drain()
+
+    async def recv(self) -> dict:
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection.")
+        return json.loads(line)
+
+    async def expect(self, *events: str) -> dict:
+        """Return the next message that is one of events, raising on an error event."""
+        while True:
+            message = await self.recv()
+            if message["event"] == "error":
+                raise ProtocolError(message["message"])
+            if message["event"] in events:
+                return message
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def serve(host: str, port: int, server: MatchServer, stats_every: float):
+    listener = await server.start(host, port)
+    logger.info(f"Serving matches on {host}:{port}")
+    async with listener:
+        while True:
+            await asyncio.sleep(stats_every)
+            logger.info(server.stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--ai-delay", type=float, default=0.5, help="Seconds an AI waits before firing."
+    )
+    parser.add_argument("--max-size", type=int, default=MAX_SIZE)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--record", help="Append finished matches to this record file.")
+    parser.add_argument("--stats-every", type=float, default=30.0)
+    parser.add_argument(
+        "--metrics",
+        help="Write span timings to METRICS.prom and METRICS.jsonl, see metrics.py.",
+    )
+    parser.add_argument("--metrics-every", type=float, default=10.0)
+    args = parser.parse_args()
+
+    recorder = record.GameWriter(args.record) if args.record else None
+    if args.metrics:
+        metrics.enable(args.metrics, args.metrics_every)
+    server = MatchServer(args.ai_delay, args.max_size, recorder, args.seed)
+    try:
+        asyncio.run(serve(args.host, args.port, server, args.stats_every))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if recorder:
+            recorder.close()
+
+
+if __name__ == "__main__":
+    main()
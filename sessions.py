@@ -0,0 +1,213 @@
+"""Many independent games in one process, sharing their rule tables."""
+import argparse
+import itertools
+import random
+import sys
+import time
+import types
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import fleet
+import record
+import targeting
+from fleet import GRID_SIZE, Fleet, Point, Ruleset
+
+# Never counted towards a session's memory, they belong to every session
+SHARED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    Ruleset,
+)
+
+
+def state_size(root, shared: Iterable = ()) -> int:
+    """Return bytes held by root and what it references, stopping at shared objects."""
+    seen = {id(obj) for obj in shared}
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        if hasattr(obj, "__dict__"):
+            stack.append(vars(obj))
+    return total
+
+
+class Session:
+    """One game between two computer-placed fleets, player A firing first."""
+
+    def __init__(self, session_id: str, rules: Ruleset, seed, now: float):
+        self.session_id = session_id
+        self.rules = rules
+        self.seed = seed
+        rng = random.Random(seed)
+        self.fleets = (
+            Fleet("Fleet A", rng=rng, rules=rules),
+            Fleet("Fleet B", rng=rng, rules=rules),
+        )
+        for flt in self.fleets:
+            flt.deploy_computer_fleet(show_progress=False)
+        self.turn = 0
+        self.winner: Optional[int] = None
+        self.shots: List[record.Shot] = []
+        self.created = self.last_active = now
+
+    @property
+    def over(self) -> bool:
+        return self.winner is not None
+
+    def target(self) -> Fleet:
+        """Return the fleet the player on turn fires upon."""
+        return self.fleets[1 - self.turn]
+
+    def fire(self, point: Point) -> Tuple[bool, str, bool]:
+        """Fire for the player on turn, returning take_fire's result."""
+        if self.over:
+            raise ValueError(f"Session {self.session_id} is over.")
+        target = self.target()
+        if not fleet.point_valid(point, self.rules.size):
+            raise ValueError(f"{point} is off the board.")
+        if target.at_point(point) in self.rules.hit_chars:
+            raise ValueError(f"{point} was already fired upon.")
+        result = target.take_fire(point)
+        self.shots.append(record.shot_record(self.turn, point, result))
+        if result[2]:
+            self.winner = self.turn
+        else:
+            self.turn = 1 - self.turn
+        return result
+
+    def play_turn(self, strategy: Callable[[Fleet], Point]) -> Tuple[bool, str, bool]:
+        """Fire where strategy picks for the player on turn."""
+        return self.fire(strategy(self.target()))
+
+    def game_record(self) -> record.GameRecord:
+        """Return the game so far, for record.GameWriter."""
+        return record.GameRecord(
+            self.seed,
+            self.rules.size,
+            tuple(record.fleet_placements(flt) for flt in self.fleets),
+            list(self.shots),
+        )
+
+    def memory(self) -> int:
+        """Return bytes of state owned by this session alone."""
+        return state_size(self)
+
+
+class SessionManager:
+    """Creates, finds and evicts sessions, sharing one Ruleset per rules in play."""
+
+    def __init__(
+        self,
+        idle_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self.sessions: Dict[str, Session] = {}
+        self.ids = itertools.count(1)
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def create(
+        self, size: int = GRID_SIZE, ships: Optional[Dict[str, int]] = None, seed=None
+    ) -> Session:
+        """Start a session on a size by size board, by default with the usual ships."""
+        session_id = str(next(self.ids))
+        session = Session(
+            session_id,
+            fleet.get_ruleset(size, ships),
+            session_id if seed is None else seed,
+            self.clock(),
+        )
+        self.sessions[session_id] = session
+        return session
+
+    def get(self, session_id: str) -> Session:
+        """Return a session, marking it active. KeyError if unknown or evicted."""
+        session = self.sessions[session_id]
+        session.last_active = self.clock()
+        return session
+
+    def close(self, session_id: str) -> Session:
+        return self.sessions.pop(session_id)
+
+    def evict_idle(self, now: Optional[float] = None) -> List[Session]:
+        """Remove and return sessions not used for longer than idle_seconds."""
+        cutoff = (self.clock() if now is None else now) - self.idle_seconds
+        idle = [s for s in self.sessions.values() if s.last_active < cutoff]
+        for session in idle:
+            del self.sessions[session.session_id]
+        self.evicted += len(idle)
+        return idle
+
+    def rulesets(self) -> List[Ruleset]:
+        """Return each distinct Ruleset of the current sessions."""
+        return list({id(s.rules): s.rules for s in self.sessions.values()}.values())
+
+    def memory(self) -> Dict[str, int]:
+        """Return bytes of state owned by each session, by session id."""
+        return {sid: session.memory() for sid, session in self.sessions.items()}
+
+    def shared_memory(self) -> int:
+        """Return bytes of the rule tables built so far, shared by every session."""
+        return sum(state_size(vars(rules)) for rules in self.rulesets())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--size", type=int, default=GRID_SIZE)
+    parser.add_argument("--strategy", choices=targeting.STRATEGIES, default="classic")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    strategy = targeting.STRATEGIES[args.strategy]
+    manager = SessionManager()
+    start = time.perf_counter()
+    for number in range(args.sessions):
+        manager.create(args.size, seed=f"{args.seed}:{number}")
+
+    def report(when: str):
+        sizes = sorted(manager.memory().values()) or [0]
+        print(
+            f"{when}: {len(manager)} sessions, state per session "
+            f"mean {sum(sizes) / len(sizes) / 1024:.1f} KiB, "
+            f"max {sizes[-1] / 1024:.1f} KiB, "
+            f"shared rules {manager.shared_memory() / 1024:.1f} KiB"
+        )
+
+    report("Deployed")
+    shots = 0
+    halfway_reported = False
+    while manager.sessions:
+        # Interleave the games shot by shot, as a worker serving them would
+        for session_id in list(manager.sessions):
+            session = manager.get(session_id)
+            session.play_turn(strategy)
+            shots += 1
+            if session.over:
+                manager.close(session_id)
+        if not halfway_reported and len(manager) <= args.sessions // 2:
+            halfway_reported = True
+            report("Half finished")
+    elapsed = time.perf_counter() - start
+    print(f"Played {args.sessions} sessions, {shots} shots in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Headless computer vs computer matches, fanned out over a process pool."""
+import argparse
+import concurrent.futures
+import functools
+import json
+import os
+import random
+from collections import namedtuple
+from typing import Callable, Iterator, List, Optional
+
+import record
+from bitboard import BitFleet
+from fleet import GRID_SIZE, Fleet, Point
+from targeting import DENSITY_MAX_SIZE, STRATEGIES, classic_target
+
+ENGINES = {
+    "grid": Fleet,
+    "sparse": functools.partial(Fleet, sparse=True),
+    "bitboard": BitFleet,
+}
+
+# record holds the game's frame from record.encode_game when recording
+GameResult = namedtuple(
+    "GameResult",
+    ["index", "seed", "winner", "shots_a", "shots_b", "record"],
+    defaults=(None,),
+)
+
+Strategy = Callable[[Fleet], Point]
+
+
+def game_seed(base_seed: int, index: int) -> str:
+    """Return the deterministic seed of game number index in a run."""
+    return f"{base_seed}:{index}"
+
+
+def play_game(
+    seed,
+    strategy_a: Strategy = classic_target,
+    strategy_b: Strategy = classic_target,
+    fleet_type=BitFleet,
+    index: int = 0,
+    size: int = GRID_SIZE,
+    recording: bool = False,
+) -> GameResult:
+    """Play one game between two computer fleets, player A first, no view or audio."""
+    rng = random.Random(seed)
+    fleet_a = fleet_type("Fleet A", rng=rng, size=size)
+    fleet_a.deploy_computer_fleet(show_progress=False)
+    fleet_b = fleet_type("Fleet B", rng=rng, size=size)
+    fleet_b.deploy_computer_fleet(show_progress=False)
+    max_shots = size * size
+    shots = {"A": 0, "B": 0}
+    fired = []
+    turns = (("A", strategy_a, fleet_b), ("B", strategy_b, fleet_a))
+    while True:
+        for number, (player, strategy, target) in enumerate(turns):
+            shots[player] += 1
+            if shots[player] > max_shots:
+                raise RuntimeError(
+                    f"Player {player} fired more than {max_shots} shots in game {seed}."
+                )
+            point = strategy(target)
+            result = target.take_fire(point)
+            if recording:
+                fired.append(record.shot_record(number, point, result))
+            if result[2]:
+                frame = None
+                if recording:
+                    frame = record.encode_game(
+                        record.GameRecord(
+                            seed,
+                            size,
+                            (
+                                record.fleet_placements(fleet_a),
+                                record.fleet_placements(fleet_b),
+                            ),
+                            fired,
+                        )
+                    )
+                return GameResult(index, seed, player, shots["A"], shots["B"], frame)
+
+
+def _play_batch(
+    start: int,
+    stop: int,
+    base_seed: int,
+    strategy_a: Strategy,
+    strategy_b: Strategy,
+    fleet_type,
+    size: int,
+    recording: bool,
+) -> List[GameResult]:
+    """Play games start..stop-1 of a run inside a worker process."""
+    return [
+        play_game(
+            game_seed(base_seed, i),
+            strategy_a,
+            strategy_b,
+            fleet_type,
+            i,
+            size,
+            recording,
+        )
+        for i in range(start, stop)
+    ]
+
+
+def stream_batches(
+    play_batch: Callable[..., List],
+    games: int,
+    args: tuple = (),
+    workers: Optional[int] = None,
+    batch_size: int = 500,
+) -> Iterator:
+    """Yield every item of play_batch(start, stop, *args) over a process pool."""
+    workers = workers or os.cpu_count() or 1
+    batches = iter(range(0, games, batch_size))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+
+        def submit_next() -> bool:
+            start = next(batches, None)
+            if start is None:
+                return False
+            stop = min(start + batch_size, games)
+            pending.add(executor.submit(play_batch, start, stop, *args))
+            return True
+
+        # A couple of batches per worker in flight keeps memory flat
+        for _ in range(workers * 2):
+            if not submit_next():
+                break
+        try:
+            while pending:
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    pending.remove(future)
+                    submit_next()
+                    yield from future.result()
+        finally:
+            # Closing the iterator early cancels batches not yet started
+            for future in pending:
+                future.cancel()
+
+
+def run_games(
+    games: int,
+    base_seed: int = 0,
+    workers: Optional[int] = None,
+    batch_size: int = 500,
+    strategy_a: Strategy = classic_target,
+    strategy_b: Strategy = classic_target,
+    fleet_type=BitFleet,
+    size: int = GRID_SIZE,
+    recording: bool = False,
+) -> Iterator[GameResult]:
+    """Yield results of games over a process pool, out of order as batches finish."""
+    return stream_batches(
+        _play_batch,
+        games,
+        (base_seed, strategy_a, strategy_b, fleet_type, size, recording),
+        workers,
+        batch_size,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=500)
+    # Dense scoring doesn't fit in memory on the largest, sparse boards
+    strategy_help = f"Beyond size {DENSITY_MAX_SIZE} every strategy plays classic."
+    parser.add_argument(
+        "--strategy-a", choices=STRATEGIES, default="classic", help=strategy_help
+    )
+    parser.add_argument(
+        "--strategy-b", choices=STRATEGIES, default="classic", help=strategy_help
+    )
+    parser.add_argument(
+        "--size", type=int, default=GRID_SIZE, help="Board side length."
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default=None,
+        help="Fleet implementation. By default bitboard up to 10 squares a side, "
+        "sparse from 2000.",
+    )
+    parser.add_argument(
+        "--out", help="Write one JSON line per game to this file as results arrive."
+    )
+    parser.add_argument(
+        "--record", help="Append every game to this game record file, see record.py."
+    )
+    args = parser.parse_args()
+    engine = args.engine
+    if engine is None:
+        engine = "grid"
+        if args.size <= 10:
+            engine = "bitboard"
+        elif args.size >= 2000:
+            engine = "sparse"
+
+    out = open(args.out, "w") if args.out else None
+    recorder = None
+    if args.record:
+        # Workers encode frames against the default ship types
+        recorder = record.GameWriter(args.record, record.SHIP_TYPES)
+    wins = {"A": 0, "B": 0}
+    total_shots = 0
+    played = 0
+    try:
+        for result in run_games(
+            args.games,
+            args.seed,
+            args.workers,
+            args.batch_size,
+            STRATEGIES[args.strategy_a],
+            STRATEGIES[args.strategy_b],
+            ENGINES[engine],
+            args.size,
+            bool(recorder),
+        ):
+            played += 1
+            wins[result.winner] += 1
+            total_shots += result.shots_a + result.shots_b
+            if out:
+                row = result._asdict()
+                del row["record"]
+                out.write(json.dumps(row) + "\n")
+            if recorder:
+                recorder.write(result.record)
+    finally:
+        if out:
+            out.close()
+        if recorder:
+            recorder.close()
+    print(
+        f"{played} games, A won {wins['A']}, B won {wins['B']}, "
+        f"{total_shots / max(played, 1):.2f} shots per game"
+    )
+
+
+if __name__ == "__main__":
+    main()
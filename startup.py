@@ -0,0 +1,73 @@
+"""Keep startup light, and measure what each module costs to import."""
+import argparse
+import os
+import subprocess
+import sys
+from collections import namedtuple
+from typing import List
+
+# Times in microseconds, as python -X importtime reports them
+ImportTime = namedtuple("ImportTime", ["module", "self_us", "cumulative_us", "depth"])
+
+
+def lazy_tracebacks(show_locals: bool = True):
+    """Render uncaught exceptions with rich, importing it only when one occurs."""
+
+    def hook(exc_type, exc, tb):
+        from rich.traceback import install
+
+        install(show_locals=show_locals)
+        sys.excepthook(exc_type, exc, tb)
+
+    sys.excepthook = hook
+
+
+def import_times(module: str, python: str = sys.executable) -> List[ImportTime]:
+    """Import module in a fresh interpreter and return the time of every import."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=here,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        times.append(ImportTime(name.strip(), int(self_us), int(cumulative_us), depth))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("module", nargs="+", help="Modules to import, in turn.")
+    parser.add_argument("--top", type=int, default=15, help="Modules to list.")
+    parser.add_argument(
+        "--sort",
+        choices=("cumulative", "self"),
+        default="cumulative",
+        help="Rank by time including or excluding each module's own imports.",
+    )
+    args = parser.parse_args()
+
+    for module in args.module:
+        times = import_times(module)
+        total = sum(t.self_us for t in times)
+        print(f"import {module}: {total / 1000:.1f} ms, {len(times)} modules")
+        key = "cumulative_us" if args.sort == "cumulative" else "self_us"
+        ranked = sorted(times, key=lambda t: getattr(t, key), reverse=True)
+        print(f"  {'cumulative':>11} {'self':>11}  module")
+        for entry in ranked[: args.top]:
+            print(
+                f"  {entry.cumulative_us / 1000:8.1f} ms {entry.self_us / 1000:8.1f} ms"
+                f"  {entry.module}"
+            )
+
+
+if __name__ == "__main__":
+    main()
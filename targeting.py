@@ -0,0 +1,220 @@
+import functools
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import fleet
+from fleet import Fleet, Point
+
+
+# Largest board density_target scores with dense arrays, classic_target plays beyond
+DENSITY_MAX_SIZE = 1000
+
+
+def classic_target(flt: Fleet) -> Point:
+    """Fire next to a wounded ship if there is one, else at a random unshot point."""
+    if target := flt.frontier_target():
+        return target
+    return flt.random_unshot_point()
+
+
+def mask_array(mask: int, size: int) -> np.ndarray:
+    """Unpack a bitmask (bit y * size + x) into a size by size boolean array."""
+    cells = size * size
+    packed = np.frombuffer(mask.to_bytes((cells + 7) // 8, "little"), dtype=np.uint8)
+    bits = np.unpackbits(packed, bitorder="little")[:cells]
+    return bits.reshape(size, size).astype(bool)
+
+
+def remaining_ship_sizes(flt: Fleet) -> List[int]:
+    """Return sizes of ships not yet seen sunk on the fleet's grid."""
+    return [
+        size
+        for ship_type, size in flt.rules.ship_sizes.items()
+        if not flt.grid.mask_of({ship_type[0].lower()})
+    ]
+
+
+def _window_sums(cells: np.ndarray, length: int) -> np.ndarray:
+    """Sum cells over every horizontal window of length, one column per start."""
+    totals = np.zeros((cells.shape[0], cells.shape[1] + 1), dtype=np.int64)
+    np.cumsum(cells, axis=1, out=totals[:, 1:])
+    return totals[:, length:] - totals[:, :-length]
+
+
+def _spread(weights: np.ndarray, length: int) -> np.ndarray:
+    """Add each window start's weight onto every cell the window covers."""
+    starts = weights.shape[1]
+    side = starts + length - 1
+    totals = np.zeros((weights.shape[0], starts + 1), dtype=np.int64)
+    np.cumsum(weights, axis=1, out=totals[:, 1:])
+    columns = np.arange(side)
+    upper = np.minimum(columns, starts - 1) + 1
+    lower = np.maximum(columns - length + 1, 0)
+    return totals[:, upper] - totals[:, lower]
+
+
+def placement_density(
+    blocked: np.ndarray, hits: np.ndarray, lengths: List[int]
+) -> np.ndarray:
+    """Count, for every cell, the placements of each length that could cover it."""
+    side = blocked.shape[0]
+    density = np.zeros(blocked.shape, dtype=np.int64)
+    hunting = not hits.any()
+    for length in lengths:
+        if length > side:
+            continue
+        for block, hit, transposed in ((blocked, hits, False), (blocked.T, hits.T, True)):
+            weights = _window_sums(block, length) == 0
+            # Once hit, placements count by the hits they cover, finishing off wounds
+            if not hunting:
+                weights = weights * _window_sums(hit, length)
+            cover = _spread(weights, length)
+            density += cover.T if transposed else cover
+    return density
+
+
+def density_target(flt: Fleet) -> Point:
+    """Fire at the unshot cell covered by the most placements of remaining ships."""
+    size = flt.size
+    if size > DENSITY_MAX_SIZE:
+        return classic_target(flt)
+    grid = flt.grid
+    misses = mask_array(grid.mask_of({"M"}), size)
+    hits = mask_array(grid.mask_of({"H"}), size)
+    sunk = mask_array(grid.mask_of({c.lower() for c in flt.rules.ship_capitals}), size)
+    blocked = misses | sunk
+    unshot = ~(blocked | hits)
+    lengths = remaining_ship_sizes(flt)
+
+    density = placement_density(blocked, hits, lengths)
+    density[~unshot] = 0
+    if not density.any() and hits.any():
+        # Known hits fit no placement, fall back to searching open water
+        density = placement_density(blocked | hits, np.zeros_like(hits), lengths)
+        density[~unshot] = 0
+    if density.any():
+        candidates = np.flatnonzero(density == density.max())
+    else:
+        candidates = np.flatnonzero(unshot)
+    index = int(candidates[flt.rng.randrange(len(candidates))])
+    return Point(x=index % size, y=index // size)
+
+
+# Largest board the Monte Carlo targeter samples, density_target plays beyond it
+MONTE_CARLO_MAX_SIZE = 30
+
+
+@functools.lru_cache(maxsize=None)
+def placement_masks(rules: fleet.Ruleset) -> Dict[int, Tuple[int, ...]]:
+    """Return every placement of each ship length as an integer bitmask."""
+    index = rules.index
+    return {
+        length: tuple(index.mask(placement) for placement in range(first, last))
+        for length, (first, last) in index.length_ranges.items()
+    }
+
+
+def montecarlo_target(
+    flt: Fleet, budget: float = 0.5, max_samples: Optional[int] = None
+) -> Point:
+    """Fire at the cell most often occupied in sampled fleets fitting every shot."""
+    deadline = time.perf_counter() + budget
+    rules = flt.rules
+    if rules.size > MONTE_CARLO_MAX_SIZE:
+        return density_target(flt)
+    grid = flt.grid
+    hits = grid.mask_of({"H"})
+    blocked = grid.mask_of({"M"} | {c.lower() for c in rules.ship_capitals})
+    unshot = ~(hits | blocked)
+    lengths = remaining_ship_sizes(flt)
+    masks = placement_masks(rules)
+    free = {
+        length: [m for m in masks.get(length, ()) if not m & blocked and m & ~hits]
+        for length in set(lengths)
+    }
+    index = rules.index
+    covering = {}
+    remaining_hits = hits
+    while remaining_hits:
+        bit = remaining_hits & -remaining_hits
+        remaining_hits ^= bit
+        covering[bit] = []
+        for placement in index.covering(bit.bit_length() - 1):
+            length = int(index.length[placement])
+            if length in free:
+                mask = masks[length][placement - index.length_ranges[length][0]]
+                if not mask & blocked and mask & ~hits:
+                    covering[bit].append((length, mask))
+    rng = flt.rng
+
+    def sample() -> Optional[int]:
+        occupied = 0
+        left = list(lengths)
+        uncovered = hits
+        # Cover every unsunk hit first, then lay the other ships at random
+        while uncovered:
+            bit = uncovered & -uncovered
+            options = [
+                (n, m) for n, m in covering[bit] if n in left and not m & occupied
+            ]
+            if not options:
+                return None
+            length, mask = rng.choice(options)
+            left.remove(length)
+            occupied |= mask
+            uncovered &= ~mask
+        rng.shuffle(left)
+        for length in left:
+            placements = free[length]
+            if not placements:
+                return None
+            # A few blind draws usually land clear, filter only when they don't
+            for _ in range(4):
+                mask = rng.choice(placements)
+                if not mask & occupied:
+                    break
+            else:
+                clear = [m for m in placements if not m & occupied]
+                if not clear:
+                    return None
+                mask = rng.choice(clear)
+            occupied |= mask
+        return occupied
+
+    counts = [0] * (rules.size * rules.size)
+    samples = attempts = 0
+    while not max_samples or samples < max_samples:
+        attempts += 1
+        occupied = sample()
+        if occupied is not None:
+            samples += 1
+            cells = occupied & unshot
+            while cells:
+                low = cells & -cells
+                counts[low.bit_length() - 1] += 1
+                cells ^= low
+        if not attempts % 16 and time.perf_counter() >= deadline:
+            break
+    best = max(counts)
+    if not best:
+        return density_target(flt)
+    candidates = [cell for cell, count in enumerate(counts) if count == best]
+    cell = candidates[rng.randrange(len(candidates))]
+    return Point(x=cell % rules.size, y=cell // rules.size)
+
+
+STRATEGIES = {
+    "classic": classic_target,
+    "density": density_target,
+    # Capped by samples alone so seeded games repeat on any machine, players
+    # waiting on a move add a deadline, see HVCCombat and server.Match
+    "montecarlo": functools.partial(
+        montecarlo_target, budget=math.inf, max_samples=1000
+    ),
+}
+
+# Strategies slow enough to be run off an event loop
+SLOW_STRATEGIES = frozenset({"montecarlo"})
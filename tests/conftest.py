@@ -0,0 +1,12 @@
+import pytest
+
+import placements
+
+
+@pytest.fixture(autouse=True, scope="session")
+def placement_cache(tmp_path_factory):
+    """Keep placement tables the tests build out of the real cache."""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(placements, "CACHE_DIR", str(tmp_path_factory.mktemp("cache")))
+        patch.setenv("BATTLESHIP_CACHE", placements.CACHE_DIR)
+        yield placements.CACHE_DIR
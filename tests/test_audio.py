@@ -0,0 +1,89 @@
+import wave
+
+import numpy as np
+import pytest
+
+from audio import CHANNELS, SAMPLE_RATE, AudioMixer
+
+
+class StepDevice:
+    """Device the test pulls frames from by hand."""
+
+    def start(self, generator):
+        self.generator = generator
+
+    def pull(self, frames: int) -> np.ndarray:
+        return np.frombuffer(self.generator.send(frames), dtype=np.int16)
+
+    def close(self):
+        pass
+
+
+def clip(mixer, path, value, frames):
+    mixer.clips[path] = np.full(frames * CHANNELS, value, dtype=np.int16)
+
+
+@pytest.fixture
+def mixer():
+    mixer = AudioMixer(device=StepDevice())
+    yield mixer
+    mixer.close()
+
+
+def test_overlapping_voices_mix(mixer):
+    clip(mixer, "a", 1000, 4)
+    clip(mixer, "b", 30000, 2)
+    first = mixer.play("a")
+    second = mixer.play("b")
+    samples = mixer.device.pull(4)
+    # Sums clip to the 16 bit range
+    assert list(samples[::CHANNELS]) == [31000, 31000, 1000, 1000]
+    assert second.done.is_set() and first.done.is_set()
+    assert not mixer.device.pull(2).any()
+
+
+def test_voices_without_overlap_wait_their_turn(mixer):
+    clip(mixer, "a", 1, 2)
+    clip(mixer, "b", 2, 2)
+    mixer.play("a")
+    last = mixer.play("b", overlap=False)
+    assert list(mixer.device.pull(2)[::CHANNELS]) == [1, 1]
+    assert not last.done.is_set()
+    assert list(mixer.device.pull(3)[::CHANNELS]) == [2, 2, 0]
+    assert last.done.is_set()
+
+
+def test_clips_play_back_to_back(mixer):
+    clip(mixer, "a", 1, 1)
+    clip(mixer, "b", 2, 2)
+    mixer.play("a", "b")
+    assert list(mixer.device.pull(4)[::CHANNELS]) == [1, 2, 2, 0]
+
+
+def test_nothing_to_play_is_already_finished(mixer):
+    assert mixer.play().done.is_set()
+    clip(mixer, "a", 1, 100)
+    playing = mixer.play("a")
+    mixer.close()
+    assert playing.done.is_set()
+    assert mixer.play("a", block=True).done.is_set()
+
+
+def test_decoded_clips_are_cached_least_recently_used(tmp_path):
+    paths = []
+    for number in range(3):
+        path = tmp_path / f"{number}.wav"
+        with wave.open(str(path), "wb") as out:
+            out.setnchannels(CHANNELS)
+            out.setsampwidth(2)
+            out.setframerate(SAMPLE_RATE)
+            out.writeframes(np.full(20, number, dtype=np.int16).tobytes())
+        paths.append(str(path))
+    mixer = AudioMixer(cache_size=2, device=StepDevice())
+    first = mixer.load(paths[0])
+    assert list(first) == [0] * 20
+    mixer.load(paths[1])
+    assert mixer.load(paths[0]) is first
+    mixer.load(paths[2])
+    assert list(mixer.clips) == [paths[0], paths[2]]
+    mixer.close()
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+import fleet
+import placements
+from batch_sim import (
+    BatchGames,
+    frontier_scores,
+    hunt_targets,
+    play_batch,
+    random_targets,
+    replay_check,
+)
+from fleet import Fleet, Point
+
+
+def layout_fleets(games: BatchGames):
+    fleets = []
+    for layout in games.layouts:
+        flt = Fleet("Check", rules=fleet.get_ruleset(games.size, games.ships))
+        for ship in placements.layout_ships(games.index, layout, games.ships):
+            flt.add_ship(ship)
+        fleets.append(flt)
+    return fleets
+
+
+@pytest.mark.parametrize("size", [5, 7, 10])
+@pytest.mark.parametrize("seed", range(3))
+def test_shots_resolve_as_fleet_take_fire(size, seed):
+    rng = np.random.default_rng(seed)
+    games = BatchGames(20, size, rng=rng)
+    fleets = layout_fleets(games)
+    while len(games):
+        scores = frontier_scores(games)
+        ids = games.game_ids.copy()
+        shot = games.shot.copy()
+        cells = hunt_targets(games, rng)
+        hit, sunk, defeated = games.fire(cells)
+        for row, game in enumerate(ids):
+            flt = fleets[game]
+            for cell in np.flatnonzero(~shot[row]):
+                point = Point(cell % size, cell // size)
+                assert scores[row, cell] == flt.frontier_status(point)
+            point = Point(cells[row] % size, cells[row] // size)
+            ship_type = games.ship_types[sunk[row]] if sunk[row] >= 0 else ""
+            assert flt.take_fire(point) == (hit[row], ship_type, defeated[row])
+    assert (games.results >= sum(games.ships.values())).all()
+
+
+@pytest.mark.parametrize("strategy", [random_targets, hunt_targets])
+def test_traced_games_replay_through_fleet(strategy):
+    rng = np.random.default_rng(1)
+    games = BatchGames(50, rng=rng)
+    traces = play_batch(games, strategy, rng, trace=50)
+    for game, shots in enumerate(traces):
+        replay_check(games, game, shots)
+    assert (games.results >= sum(fleet.ship_sizes.values())).all()
+
+
+def test_replay_check_catches_a_changed_shot():
+    rng = np.random.default_rng(2)
+    games = BatchGames(1, rng=rng)
+    [shots] = play_batch(games, hunt_targets, rng, trace=1)
+    cell, hit, sunk, defeated = shots[0]
+    shots[0] = (cell, not hit, sunk, defeated)
+    with pytest.raises(ValueError):
+        replay_check(games, 0, shots)
@@ -0,0 +1,37 @@
+import math
+import random
+import statistics
+
+import pytest
+
+from evaluate import ShotStats
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_running_mean_and_stdev_match_statistics(seed):
+    rng = random.Random(seed)
+    shots = [rng.randint(17, 49) for _ in range(rng.randint(2, 500))]
+    stats = ShotStats()
+    for count in shots:
+        stats.add(count)
+    assert stats.games == len(shots)
+    assert math.isclose(stats.mean, statistics.mean(shots))
+    assert math.isclose(stats.stdev, statistics.stdev(shots))
+    assert stats.quantile(0.5) == sorted(shots)[math.ceil(len(shots) / 2) - 1]
+
+
+def test_intervals_contain_their_estimates():
+    rng = random.Random(1)
+    stats = ShotStats()
+    for _ in range(1000):
+        stats.add(rng.randint(17, 49))
+    low, high = stats.mean_interval(1.96)
+    assert low < stats.mean < high
+    low, high = stats.quantile_interval(0.9, 1.96)
+    assert low <= stats.quantile(0.9) <= high
+
+
+def test_empty_stats():
+    stats = ShotStats()
+    assert stats.stdev == 0.0
+    assert stats.quantile(0.5) is None
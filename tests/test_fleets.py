@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from bitboard import BitFleet, BitGrid
+from fleet import Fleet, Grid, Point, Ship, SparseGrid
+
+
+def copy_ships(source: Fleet, target: Fleet):
+    for ship in source.ships:
+        target.add_ship(
+            Ship(ship.ship_type, ship.ship_size, ship.ship_start, ship.ship_horiz)
+        )
+
+
+def frontiers(flt: Fleet):
+    """Recompute both frontiers from scratch, for comparison."""
+    statuses = {point: flt.frontier_status(point) for point in flt.point_list}
+    return (
+        {point for point, status in statuses.items() if status == 2},
+        {point for point, status in statuses.items() if status == 1},
+    )
+
+
+@pytest.mark.parametrize("size", [5, 7, 10])
+@pytest.mark.parametrize("seed", range(20))
+def test_engines_agree_shot_for_shot(size, seed):
+    reference = Fleet("Reference", rng=random.Random(seed), size=size)
+    reference.deploy_computer_fleet(show_progress=False)
+    others = [BitFleet("Bits", size=size), Fleet("Sparse", size=size, sparse=True)]
+    for other in others:
+        copy_ships(reference, other)
+    points = list(reference.point_list)
+    random.Random(seed).shuffle(points)
+    for point in points:
+        result = reference.take_fire(point)
+        for other in others:
+            assert other.take_fire(point) == result
+            assert other.grid.grid_as_string(True, True) == (
+                reference.grid.grid_as_string(True, True)
+            )
+            assert sorted(other.unsunk_hits()) == sorted(reference.unsunk_hits())
+        if result[2]:
+            break
+    assert all(flt.defeated for flt in [reference, *others])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_frontier_matches_full_scan(seed):
+    flt = Fleet("Target", rng=random.Random(seed))
+    flt.deploy_computer_fleet(show_progress=False)
+    points = list(flt.point_list)
+    random.Random(seed).shuffle(points)
+    for point in points:
+        defeated = flt.take_fire(point)[2]
+        line, open_ = frontiers(flt)
+        assert set(flt.line_frontier) == line
+        assert set(flt.open_frontier) == open_
+        if defeated:
+            break
+
+
+@pytest.mark.parametrize("grid_type", [BitGrid, SparseGrid])
+def test_hidden_grids_match(grid_type):
+    grids = [Grid(7), grid_type(7)]
+    for grid in grids:
+        grid.set_label_at(Point(0, 0), "*")
+        grid.set_label_at(Point(1, 1), "S")
+        grid.set_label_at(Point(2, 1), "s")
+        grid.set_label_at(Point(3, 2), "M")
+    for show_ships in (True, False):
+        for headers in (True, False):
+            expected = grids[0].grid_as_string(show_ships, headers)
+            assert grids[1].grid_as_string(show_ships, headers) == expected
+    assert grids[1].grid_as_string(False, False).startswith("wwwwwww\n")
@@ -0,0 +1,37 @@
+from framebuffer import FrameBuffer, MockMatrix8x8x2
+
+
+def frame(color, size=8):
+    return [[color] * size for _ in range(size)]
+
+
+def test_first_frame_writes_every_pixel_once():
+    matrix = MockMatrix8x8x2()
+    buffer = FrameBuffer(matrix)
+    assert not matrix.auto_write
+    assert buffer.draw(frame(matrix.LED_OFF)) == 64
+    assert matrix.pixel_sets == 64
+    assert matrix.bus_writes == 1
+
+
+def test_only_changed_pixels_are_written():
+    matrix = MockMatrix8x8x2()
+    buffer = FrameBuffer(matrix)
+    buffer.draw(frame(matrix.LED_OFF))
+    changed = frame(matrix.LED_OFF)
+    changed[2][5] = matrix.LED_RED
+    changed[7][0] = matrix.LED_GREEN
+    assert buffer.draw(changed) == 2
+    assert matrix.pixel_sets == 66
+    assert matrix[2, 5] == matrix.LED_RED
+    assert matrix[7, 0] == matrix.LED_GREEN
+    # An unchanged frame writes nothing, not even show()
+    assert buffer.draw(changed) == 0
+    assert matrix.bus_writes == 2
+
+
+def test_larger_boards_are_clipped_to_the_matrix():
+    matrix = MockMatrix8x8x2()
+    buffer = FrameBuffer(matrix)
+    assert buffer.draw(frame(matrix.LED_YELLOW, size=12)) == 64
+    assert matrix.pixels == frame(matrix.LED_YELLOW)
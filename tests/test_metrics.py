@@ -0,0 +1,82 @@
+import json
+import time
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = metrics.enable(str(tmp_path / "run"), interval=3600)
+    yield registry
+    metrics.disable()
+
+
+def prometheus_values(text):
+    values = {}
+    for line in text.splitlines():
+        if not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            values[name] = float(value)
+    return values
+
+
+def test_spans_cost_nothing_until_enabled():
+    assert metrics.span("take_fire") is metrics.span("render")
+    assert metrics.timed("take_fire", max, 3, 4) == 4
+
+
+def test_spans_are_timed_once_enabled(registry):
+    with metrics.span("take_fire"):
+        pass
+    assert metrics.timed("ai_decision", sum, [1, 2]) == 3
+    assert registry.histograms["take_fire"].count == 1
+    assert registry.histograms["ai_decision"].count == 1
+
+
+def test_prometheus_and_json_lines_files(registry):
+    for seconds in (0.0003, 0.002, 0.002, 45.0):
+        registry.observe("render", seconds)
+    metrics.disable()
+
+    prom = open(f"{registry.path}.prom").read()
+    assert "# TYPE battleship_span_seconds histogram" in prom
+    values = prometheus_values(prom)
+    bucket = 'battleship_span_seconds_bucket{span="render",le="%s"}'
+    assert values[bucket % "0.0001"] == 0
+    assert values[bucket % "0.0005"] == 1
+    assert values[bucket % "0.0025"] == 3
+    assert values[bucket % "30.0"] == 3
+    assert values[bucket % "+Inf"] == 4
+    assert values['battleship_span_seconds_count{span="render"}'] == 4
+    assert values['battleship_span_seconds_sum{span="render"}'] == pytest.approx(
+        45.0043
+    )
+
+    [line] = open(f"{registry.path}.jsonl").read().splitlines()
+    render = json.loads(line)["spans"]["render"]
+    assert render["count"] == 4
+    assert render["max"] == 45.0
+    assert render["buckets"]["0.0025"] == 3
+    assert render["buckets"]["+Inf"] == 4
+
+
+def test_snapshots_are_appended_every_interval(tmp_path):
+    path = tmp_path / "run.jsonl"
+
+    def snapshots():
+        return path.read_text().splitlines() if path.exists() else []
+
+    registry = metrics.enable(str(tmp_path / "run"), interval=0.01)
+    try:
+        registry.observe("render", 0.001)
+        deadline = time.monotonic() + 5
+        while len(snapshots()) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        metrics.disable()
+    # At least two from the writer thread, and a last one on disable
+    lines = snapshots()
+    assert len(lines) >= 3
+    assert all(json.loads(line)["spans"]["render"]["count"] == 1 for line in lines)
@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from fleet import Point, Ship
+from placements import PlacementIndex, packed_mask
+
+
+def brute_force_fitting(size, length, blocked):
+    """Return the cells of every placement of length avoiding blocked, by Ship."""
+    fits = set()
+    for horiz in (True, False):
+        for y in range(size):
+            for x in range(size):
+                cells = set(Ship("Test", length, Point(x, y), horiz).ship_coords)
+                on_board = all(0 <= c.x < size and 0 <= c.y < size for c in cells)
+                if on_board and not cells & blocked:
+                    fits.add(frozenset(cells))
+    return fits
+
+
+@pytest.mark.parametrize("size", [5, 7, 9])
+@pytest.mark.parametrize("seed", range(5))
+def test_fitting_matches_brute_force(size, seed):
+    rng = random.Random(seed)
+    index = PlacementIndex.build(size, (2, 3, 4))
+    blocked = {
+        Point(x, y) for x in range(size) for y in range(size) if rng.random() < 0.2
+    }
+    mask = sum(1 << (point.y * size + point.x) for point in blocked)
+    for length in (2, 3, 4):
+        found = index.fitting(length, packed_mask(mask, size))
+        cells = {frozenset(index.ship(int(p), "Test").ship_coords) for p in found}
+        assert len(cells) == len(found)
+        assert cells == brute_force_fitting(size, length, blocked)
+
+
+def test_placement_ids_round_trip():
+    index = PlacementIndex.build(7, (2, 3, 4))
+    for placement in range(len(index.length)):
+        ship = index.ship(placement, "Test")
+        found = index.placement_id(ship.ship_size, ship.ship_start, ship.ship_horiz)
+        assert found == placement
+        assert index.mask(placement) == sum(
+            1 << (c.y * 7 + c.x) for c in ship.ship_coords
+        )
@@ -0,0 +1,83 @@
+import pytest
+
+import record
+import sessions
+import targeting
+from bitboard import BitFleet
+from fleet import Fleet
+from simulate import play_game
+
+
+def played_game(seed, size=7) -> record.GameRecord:
+    frame = play_game(seed, size=size, recording=True).record
+    return record.decode_game(frame, record.get_varint(frame, 0)[1])
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 1 << 40])
+def test_varint_round_trip(value):
+    out = bytearray()
+    record.put_varint(out, value)
+    assert record.get_varint(out, 0) == (value, len(out))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_encode_decode_round_trip(seed):
+    game = played_game(seed)
+    frame = record.encode_game(game)
+    assert record.decode_game(frame, record.get_varint(frame, 0)[1]) == game
+
+
+@pytest.mark.parametrize("fleet_type", [Fleet, BitFleet])
+def test_replay_reaches_the_recorded_end(fleet_type):
+    game = played_game(3)
+    shots = list(record.replay(game, fleet_type))
+    assert len(shots) == len(game.shots)
+    assert shots[-1][1].defeated
+
+
+def test_replay_rejects_a_changed_result():
+    game = played_game(4)
+    shots = list(game.shots)
+    shots[0] = shots[0]._replace(hit=not shots[0].hit)
+    with pytest.raises(ValueError):
+        list(record.replay(game._replace(shots=shots)))
+
+
+def test_file_round_trip(tmp_path):
+    path = str(tmp_path / "games.bsgr")
+    games = [played_game(seed) for seed in range(5)]
+    with record.GameWriter(path) as writer:
+        for game in games[:3]:
+            writer.write(game)
+    # Appending keeps the existing header
+    with record.GameWriter(path) as writer:
+        for game in games[3:]:
+            writer.write(record.encode_game(game, writer.ship_types))
+    assert list(record.read_games(path, chunk_size=64)) == games
+
+
+def test_custom_ruleset_round_trip(tmp_path):
+    path = str(tmp_path / "custom.bsgr")
+    manager = sessions.SessionManager()
+    session = manager.create(9, {"Carrier": 5, "Destroyer": 3}, seed="1")
+    while not session.over:
+        session.play_turn(targeting.classic_target)
+    with record.GameWriter(path) as writer:
+        writer.write(session.game_record())
+    (game,) = record.read_games(path)
+    assert game == session.game_record()
+    assert len(list(record.replay(game))) == len(session.shots)
+    # A file keeps to the ship types of its header
+    default = manager.create(7, seed=2)
+    with pytest.raises(ValueError):
+        with record.GameWriter(path) as writer:
+            writer.write(default.game_record())
+
+
+def test_truncated_file_is_reported(tmp_path):
+    path = tmp_path / "games.bsgr"
+    with record.GameWriter(str(path)) as writer:
+        writer.write(played_game(1))
+    path.write_bytes(path.read_bytes()[:-3])
+    with pytest.raises(ValueError):
+        list(record.read_games(str(path)))
@@ -0,0 +1,65 @@
+import fleet
+from framebuffer import MockMatrix8x8x2
+from matrix_views import MatrixView
+from render import RenderScheduler
+from views import Areas
+
+
+def matrix_view():
+    return MatrixView(None, MockMatrix8x8x2(), MockMatrix8x8x2())
+
+
+def test_wraps_a_view_without_update_area():
+    view = matrix_view()
+    scheduler = RenderScheduler(view)
+    assert set(scheduler.draws) == {"display_grid", "display_text"}
+    assert not hasattr(view, "update_area")
+
+
+def test_coalesces_draws_between_frames():
+    view = matrix_view()
+    scheduler = RenderScheduler(view)
+    # As if a frame was just painted, so draws queue until flush
+    scheduler.last_frame = float("inf")
+    flt = fleet.Fleet("Test", size=8)
+    flt.deploy_computer_fleet(show_progress=False)
+    scheduler.display_grid(flt.ships_grid(False), False, Areas.BG)
+    flt.take_fire(fleet.Point(0, 0))
+    scheduler.display_grid(flt.ships_grid(False), False, Areas.BG)
+    scheduler.display_grid(flt.ships_grid(True), True, Areas.BS)
+    scheduler.display_text("Fire!", Areas.TR)
+    assert view.guess_matrix.bus_writes == 0
+    assert view.fleet_matrix.bus_writes == 0
+    scheduler.flush()
+    assert scheduler.stats() == {
+        "frames_flushed": 1,
+        "updates_flushed": 3,
+        "updates_dropped": 1,
+    }
+    assert view.guess_matrix.bus_writes == 1
+    assert view.fleet_matrix.bus_writes == 1
+
+
+def test_paints_when_a_frame_is_due():
+    view = matrix_view()
+    scheduler = RenderScheduler(view, max_fps=1e9)
+    flt = fleet.Fleet("Test", size=8)
+    scheduler.display_grid(flt.ships_grid(False), False, Areas.BG)
+    flt.take_fire(fleet.Point(0, 0))
+    scheduler.display_grid(flt.ships_grid(False), False, Areas.BG)
+    assert scheduler.stats()["frames_flushed"] == 2
+    assert scheduler.stats()["updates_dropped"] == 0
+    # The second frame writes only the square fired upon
+    assert view.guess_matrix.pixel_sets == 65
+
+
+def test_view_methods_flush_first():
+    view = matrix_view()
+    scheduler = RenderScheduler(view)
+    scheduler.last_frame = float("inf")
+    flt = fleet.Fleet("Test", size=8)
+    scheduler.display_text("first", Areas.TR)
+    scheduler.display_grid(flt.ships_grid(True), True, Areas.BS)
+    assert view.fleet_matrix.bus_writes == 0
+    scheduler.highlight_target(flt, fleet.Point(2, 2), Areas.BG)
+    assert view.fleet_matrix.bus_writes == 1
@@ -0,0 +1,132 @@
+import asyncio
+import itertools
+
+import pytest
+
+import fleet
+from server import MatchClient, MatchServer, ProtocolError
+
+
+def run_with_server(scenario, **kwargs):
+    """Run scenario(port) against a MatchServer on a free local port."""
+
+    async def main():
+        server = MatchServer(ai_delay=0, seed=1, **kwargs)
+        listener = await server.start("127.0.0.1", 0)
+        try:
+            port = listener.sockets[0].getsockname()[1]
+            return await asyncio.wait_for(scenario(port), timeout=30)
+        finally:
+            listener.close()
+            await listener.wait_closed()
+
+    return asyncio.run(main())
+
+
+def test_human_against_ai_plays_to_the_end():
+    async def scenario(port):
+        client = await MatchClient.connect(port=port)
+        await client.send("new", seats=["human", "classic"], size=5)
+        assert (await client.expect("created"))["seat"] == 0
+        await client.send("place")
+        placed = (await client.expect("placed"))["ships"]
+        assert len(placed) == len(fleet.get_ruleset(5).ship_sizes)
+        assert (await client.expect("start"))["turn"] == 0
+        board = itertools.product(range(5), range(5))
+        await client.send("fire", **dict(zip("xy", next(board))))
+        while True:
+            message = await client.expect("shot", "over")
+            if message["event"] == "over":
+                break
+            if message["turn"] == 0:
+                await client.send("fire", **dict(zip("xy", next(board))))
+        await client.close()
+        return message
+
+    over = run_with_server(scenario)
+    assert over["winner"] in (0, 1)
+    assert over["reason"] == "sunk"
+
+
+def test_ai_match_is_watched_to_the_end():
+    async def scenario(port):
+        client = await MatchClient.connect(port=port)
+        await client.send("new", seats=["classic", "density"], size=6)
+        created = await client.expect("created")
+        assert created["seat"] is None
+        shots = 0
+        while True:
+            message = await client.expect("shot", "over")
+            if message["event"] == "over":
+                break
+            shots += 1
+        await client.close()
+        return shots, message
+
+    shots, over = run_with_server(scenario)
+    assert over["reason"] == "sunk"
+    # The winner hits every segment, taking turns with the loser
+    segments = sum(fleet.get_ruleset(6).ship_sizes.values())
+    assert shots >= 2 * segments - 1
+
+
+def test_firing_out_of_turn_is_refused():
+    async def scenario(port):
+        first = await MatchClient.connect(port=port)
+        await first.send("new", seats=["human", "human"], size=5)
+        match = (await first.expect("created"))["match"]
+        second = await MatchClient.connect(port=port)
+        await second.send("join", match=match)
+        await second.send("place")
+        await first.send("place")
+        await first.expect("start")
+        await second.expect("start")
+        await second.send("fire", x=0, y=0)
+        with pytest.raises(ProtocolError):
+            await second.expect("shot")
+        await first.send("fire", x=9, y=0)
+        with pytest.raises(ProtocolError):
+            await first.expect("shot")
+        await first.send("fire", x=0, y=0)
+        shot = await second.expect("shot")
+        assert (shot["seat"], shot["turn"]) == (0, 1)
+        await first.close()
+        await second.close()
+
+    run_with_server(scenario)
+
+
+def test_seat_left_before_the_start_is_placed_afresh():
+    async def scenario(port):
+        first = await MatchClient.connect(port=port)
+        await first.send("new", seats=["human", "human"], size=5)
+        match = (await first.expect("created"))["match"]
+        second = await MatchClient.connect(port=port)
+        await second.send("join", match=match)
+        await first.send("place")
+        await first.expect("placed")
+        await first.send("leave")
+        third = await MatchClient.connect(port=port)
+        await third.send("join", match=match)
+        await third.send("place")
+        await third.expect("placed")
+        await second.send("place")
+        assert (await third.expect("start"))["turn"] == 0
+        for client in (first, second, third):
+            await client.close()
+
+    run_with_server(scenario)
+
+
+def test_malformed_seats_are_refused():
+    async def scenario(port):
+        client = await MatchClient.connect(port=port)
+        await client.send("new", seats=[[], "human"], size=5)
+        with pytest.raises(ProtocolError):
+            await client.expect("created")
+        # The connection survives to make a proper request
+        await client.send("new", seats=["human", "classic"], size=5)
+        await client.expect("created")
+        await client.close()
+
+    run_with_server(scenario)
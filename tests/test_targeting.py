@@ -0,0 +1,98 @@
+import random
+
+import numpy as np
+import pytest
+
+import targeting
+from fleet import Fleet, Point, Ship, surrounding_points
+
+
+def brute_force_density(blocked, hits, lengths):
+    """Count placements over each cell by Ship, weighted by the hits they cover."""
+    size = len(blocked)
+    density = np.zeros((size, size), dtype=np.int64)
+    for length in lengths:
+        for horiz in (True, False):
+            for y in range(size):
+                for x in range(size):
+                    cells = Ship("Test", length, Point(x, y), horiz).ship_coords
+                    if not all(0 <= c.x < size and 0 <= c.y < size for c in cells):
+                        continue
+                    if any(blocked[c.y, c.x] for c in cells):
+                        continue
+                    weight = sum(hits[c.y, c.x] for c in cells) if hits.any() else 1
+                    for c in cells:
+                        density[c.y, c.x] += weight
+    return density
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_density_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    size = int(rng.integers(5, 11))
+    blocked = rng.random((size, size)) < 0.2
+    hits = ~blocked & (rng.random((size, size)) < 0.05 * (seed % 2))
+    lengths = [2, 3, 3, 4]
+    expected = brute_force_density(blocked, hits, lengths)
+    assert (targeting.placement_density(blocked, hits, lengths) == expected).all()
+
+
+def deployed(seed, size=7):
+    flt = Fleet("Test", rng=random.Random(seed), size=size)
+    flt.deploy_computer_fleet(show_progress=False)
+    return flt
+
+
+@pytest.mark.parametrize("strategy", ["classic", "density", "montecarlo"])
+@pytest.mark.parametrize("seed", range(5))
+def test_wounded_ships_are_finished_off(strategy, seed):
+    flt = deployed(seed)
+    ship = sorted(flt.ships, key=lambda s: s.ship_type)[seed % len(flt.ships)]
+    hit = min(ship.ship_coords)
+    flt.take_fire(hit)
+    neighbours = surrounding_points(hit, flt.size)
+    assert targeting.STRATEGIES[strategy](flt) in neighbours
+
+
+@pytest.mark.parametrize("strategy", ["classic", "density", "montecarlo"])
+def test_games_end_without_repeating_a_shot(strategy):
+    flt = deployed(1)
+    fired = set()
+    defeated = False
+    while not defeated:
+        point = targeting.STRATEGIES[strategy](flt)
+        assert point not in fired
+        fired.add(point)
+        defeated = flt.take_fire(point)[2]
+    assert len(fired) < flt.size * flt.size
+
+
+def test_shared_montecarlo_repeats_for_a_seed():
+    picks = []
+    for _ in range(2):
+        flt = deployed(3)
+        shots = []
+        for _ in range(10):
+            point = targeting.STRATEGIES["montecarlo"](flt)
+            shots.append(point)
+            flt.take_fire(point)
+        picks.append(shots)
+    assert picks[0] == picks[1]
+
+
+def test_huge_boards_fall_back_to_classic(monkeypatch):
+    flt = deployed(4, size=8)
+    monkeypatch.setattr(targeting, "DENSITY_MAX_SIZE", 7)
+    flt.rng.seed(0)
+    expected = targeting.classic_target(flt)
+    flt.rng.seed(0)
+    assert targeting.density_target(flt) == expected
+
+
+def test_large_boards_fall_back_to_density(monkeypatch):
+    flt = deployed(4, size=8)
+    monkeypatch.setattr(targeting, "MONTE_CARLO_MAX_SIZE", 7)
+    flt.rng.seed(0)
+    expected = targeting.density_target(flt)
+    flt.rng.seed(0)
+    assert targeting.montecarlo_target(flt) == expected
@@ -1,8 +1,9 @@
 from enum import Enum, auto
 from typing import Tuple, List
-from loguru import logger
 import fleet
+import metrics
 import os
+import time
 
 
 from blessed import Terminal
@@ -15,9 +16,6 @@ from rich.layout import Layout
 from rich.console import Console
 from rich.theme import Theme
 from rich.align import Align
-from rich.traceback import install
-
-install(show_locals=True)
 
 
 theme_dict = {
@@ -107,11 +105,19 @@ class RichView:
 
     def clear_and_print(self):
         # os.system("clear")
-        console.print(self.full_layout)
+        with metrics.span("render"):
+            console.print(self.full_layout)
+
+    def refresh_area(self, area: Areas):
+        """Show a changed area. RichView reprints the whole layout."""
+        self.clear_and_print()
 
     def update_area(self, area, text):
         self.areas[area].update(styled.Styled(text, style="red"))
-        self.clear_and_print()
+        self.refresh_area(area)
+
+    def flush(self):
+        """Paint updates held back for a later frame. RichView paints at once."""
 
     def aim_column(self, area, column):
         pass
@@ -126,27 +132,29 @@ class RichView:
         return val
 
     def display_grid(self, grid: List[fleet.Square], show_ships: bool, area: Areas):
-        styled_grid = Text()
-        for row in grid:
-            for square in row:
-                label = square.get_label()
-                if not show_ships:
-                    if label in fleet.ship_capitals:
-                        label = "w"
-                highlight = square.get_highlight()
-                theme = theme_dict.get(label, '')
-                style = f"{theme}{' on ' if highlight else ''}{highlight}"
-                styled_grid.append(label, style=style)
-                if label != "\n":
-                    styled_grid.append(" ", None)
-            styled_grid.append("\n", None)
-
-        self.areas[area].update(styled_grid)
-        self.clear_and_print()
-        
+        with metrics.span("display_grid"):
+            styled_grid = Text()
+            for row in grid:
+                for square in row:
+                    label = square.get_label()
+                    if not show_ships:
+                        if label in fleet.ship_capitals:
+                            label = "w"
+                    highlight = square.get_highlight()
+                    theme = theme_dict.get(label, '')
+                    style = f"{theme}{' on ' if highlight else ''}{highlight}"
+                    styled_grid.append(label, style=style)
+                    if label != "\n":
+                        styled_grid.append(" ", None)
+                styled_grid.append("\n", None)
+
+            self.areas[area].update(styled_grid)
+            self.refresh_area(area)
+
     def display_text(self, text: str, ar: Areas):
-        self.areas[ar].update(text)
-        self.clear_and_print()
+        with metrics.span("display_text"):
+            self.areas[ar].update(text)
+            self.refresh_area(ar)
 
     def highlight_target(self, flt: fleet.Fleet, point: fleet.Point, area: Areas):
         flt.remove_all_highlights()
@@ -172,7 +180,7 @@ class RichView:
                     target_y -= 1
                     self.highlight_target(flt=flt, point=fleet.Point(y=target_y, x=target_x), area=Areas.BG)
             elif key.name == "KEY_DOWN":
-                if target_y < fleet.GRID_SIZE - 1:
+                if target_y < flt.size - 1:
                     target_y += 1
                     self.highlight_target(flt=flt, point=fleet.Point(y=target_y, x=target_x), area=Areas.BG)
             elif key.name == "KEY_LEFT":
@@ -180,7 +188,7 @@ class RichView:
                     target_x -= 1
                     self.highlight_target(flt=flt, point=fleet.Point(y=target_y, x=target_x), area=Areas.BG)
             elif key.name == "KEY_RIGHT":
-                if target_x < fleet.GRID_SIZE - 1:
+                if target_x < flt.size - 1:
                     target_x += 1
                     self.highlight_target(flt=flt, point=fleet.Point(y=target_y, x=target_x), area=Areas.BG)
             else:
@@ -218,3 +226,89 @@ class RichView:
         self.game_over_layout["lower_third"].update(winner_text)
         os.system("clear")
         console.print(self.game_over_layout)
+
+
+class LiveRichView(RichView):
+    """RichView on a persistent full screen display, repainting only changed areas."""
+
+    def __init__(self, term: Terminal, max_fps: float = 30):
+        self.frame_interval = 1 / max_fps
+        self.last_frame = 0.0
+        self.dirty = set()
+        self.screen_size = None
+        self.live = Live(
+            console=console, screen=True, auto_refresh=False, transient=True
+        )
+        self.live.start()
+        super().__init__(term)
+
+    def clear_and_print(self):
+        """Repaint the whole layout, remembering each area's screen region."""
+        self.screen_size = console.size
+        with metrics.span("render"):
+            console.update_screen(self.full_layout)
+        self.dirty.clear()
+        self.last_frame = time.monotonic()
+
+    def refresh_area(self, area: Areas):
+        self.dirty.add(area)
+        if time.monotonic() - self.last_frame >= self.frame_interval:
+            self.flush()
+
+    def flush(self):
+        """Paint every area changed since the last frame."""
+        if not self.dirty:
+            return
+        if console.size != self.screen_size:
+            self.clear_and_print()
+            return
+        with metrics.span("render"):
+            render_map = self.full_layout.map
+            for area in self.dirty:
+                layout = self.areas[area]
+                if layout not in render_map:
+                    # Hidden, like the computer's side
+                    continue
+                x, y, width, height = render_map[layout].region
+                lines = console.render_lines(
+                    layout, console.options.update_dimensions(width, height)
+                )
+                console.update_screen_lines(lines, x, y)
+        self.dirty.clear()
+        self.last_frame = time.monotonic()
+
+    def get_direction(self) -> str:
+        # Nothing may wait unpainted while the player decides
+        self.flush()
+        return super().get_direction()
+
+    def show_game_over(self, winner):
+        self.live.stop()
+        super().show_game_over(winner)
+
+
+class NullView(RichView):
+    """RichView that prints nothing, picking the human's shots by strategy."""
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.winner = None
+        super().__init__(term=None)
+
+    def clear_and_print(self):
+        pass
+
+    def get_direction(self) -> str:
+        return "\n"
+
+    def get_fire_coords(self, flt: fleet.Fleet) -> fleet.Point:
+        self.display_text("Arrows to choose, Enter to fire.", Areas.BT)
+        coords = self.strategy(flt)
+        self.highlight_target(flt=flt, point=coords, area=Areas.BG)
+        self.display_text("", Areas.BT)
+        flt.remove_all_highlights()
+        self.display_grid(flt.grid.ships_grid(False, False), show_ships=False, area=Areas.BG)
+        return coords
+
+    def show_game_over(self, winner):
+        self.winner = winner